@@ -9,3 +9,4 @@ Module to ingest and process raw glider data into NetCDF files
 '''
 from .processor import Processor
 from .variable import Variable
+from .derived import DerivedVariable, register_derived_variable
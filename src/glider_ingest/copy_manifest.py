@@ -0,0 +1,239 @@
+'''
+Module containing the manifest based incremental file copy.
+'''
+from attrs import define, field
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import hashlib
+import json
+import logging
+import os
+import shutil
+import zlib
+
+MANIFEST_FILENAME = '.copy_manifest.json'
+LINK_MODES = ['copy', 'hardlink', 'symlink']
+
+
+def file_hash(path: Path, chunk_size: int = 1 << 20) -> str:
+    '''
+    Compute a fast BLAKE2 hash of the contents of a file.
+
+    Args:
+        path (Path): The file to hash.
+        chunk_size (int): Number of bytes read at a time.
+
+    Returns:
+        str: The hexadecimal digest.
+    '''
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_signature(path: Path, entry: dict|None = None, chunk_size: int = 1 << 20) -> dict:
+    '''
+    Get the size, modification time and CRC32 checksum of a file.
+
+    The checksum of a previous signature is reused when the size and modification time are unchanged,
+    so unchanged files are not read again.
+
+    Args:
+        path (Path): The file.
+        entry (dict | None): A previous signature of the file.
+        chunk_size (int): Number of bytes read at a time.
+
+    Returns:
+        dict: The ``size``, ``mtime_ns`` and ``crc`` of the file.
+    '''
+    stat = os.stat(path)
+    signature = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+    if entry is not None and 'crc' in entry and \
+            (entry['size'], entry['mtime_ns']) == (signature['size'], signature['mtime_ns']):
+        signature['crc'] = entry['crc']
+        return signature
+
+    crc = 0
+    with open(path, 'rb') as f:
+        while chunk := f.read(chunk_size):
+            crc = zlib.crc32(chunk, crc)
+    signature['crc'] = crc
+    return signature
+
+
+@define
+class CopyManifest:
+    '''
+    Record of the files copied into a directory.
+
+    Entries are keyed by the file path relative to the destination directory and hold the size,
+    modification time and, when hashing is enabled, the hash of the source file when it was copied,
+    and the link mode for files that were linked instead of copied.
+
+    Attributes:
+        path (Path): Location of the manifest file.
+        entries (dict): Signature of every copied file.
+    '''
+    path: Path
+    entries: dict = field(factory=dict)
+
+    @property
+    def logger(self):
+        """Get the logger instance for this manifest."""
+        return logging.getLogger('glider_ingest')
+
+    @classmethod
+    def load(cls, path: Path) -> 'CopyManifest':
+        '''
+        Load a manifest, starting an empty one if the file does not exist or cannot be read.
+
+        Args:
+            path (Path): Location of the manifest file.
+
+        Returns:
+            CopyManifest: The loaded manifest.
+        '''
+        path = Path(path)
+        manifest = cls(path)
+        if path.exists():
+            try:
+                manifest.entries = json.loads(path.read_text())
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                manifest.logger.warning("Ignoring unreadable copy manifest: %s", path)
+        return manifest
+
+    def save(self):
+        '''
+        Write the manifest, replacing the previous file only once the new one is complete.
+        '''
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        tmp_path.write_text(json.dumps(self.entries, indent=1, sort_keys=True))
+        tmp_path.replace(self.path)
+
+
+def _is_linked(source: Path, destination: Path, mode: str) -> bool:
+    '''
+    Check that the destination is a copy, hard link or symbolic link of the source, as given by `mode`.
+    '''
+    if mode == 'symlink':
+        return destination.is_symlink()
+    if destination.is_symlink():
+        return False
+    return destination.samefile(source) if mode == 'hardlink' else True
+
+
+def _place_file(source: Path, destination: Path, mode: str):
+    '''
+    Copy or link the source to the destination, replacing any existing destination.
+
+    The destination is removed first, so writing never goes through a previous link into the source.
+    Hard links fall back to a copy when the destination is on another file system.
+    '''
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    destination.unlink(missing_ok=True)
+    if mode == 'symlink':
+        destination.symlink_to(source.resolve())
+    elif mode == 'hardlink':
+        try:
+            os.link(source, destination)
+        except OSError:
+            logging.getLogger('glider_ingest').debug("Cannot hard link %s, copying instead", source)
+            shutil.copy2(source, destination)
+    else:
+        shutil.copy2(source, destination)
+
+
+def _sync_file(source: Path, destination: Path, entry: dict|None, hash_files: bool,
+               trust_manifest: bool, mode: str = 'copy') -> tuple[dict, bool]:
+    '''
+    Copy or link a file unless the destination already holds the same version.
+
+    The source is compared with its manifest entry, or with the destination file itself when there
+    is no entry or the manifest is not trusted. Files of equal size and modification time are skipped.
+    With `hash_files`, files of equal size whose modification time changed are skipped when their
+    hashes match. Files placed with another link mode are replaced.
+
+    Returns:
+        tuple[dict, bool]: The manifest entry of the file and whether it was copied.
+    '''
+    stat = source.stat()
+    signature = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+    if mode != 'copy':
+        signature['mode'] = mode
+
+    if destination.exists():
+        if entry is None or not trust_manifest:
+            destination_stat = destination.stat()
+            entry = {'size': destination_stat.st_size, 'mtime_ns': destination_stat.st_mtime_ns}
+            if not _is_linked(source, destination, mode):
+                entry['mode'] = None
+            elif mode != 'copy':
+                entry['mode'] = mode
+        if entry['size'] == signature['size'] and entry.get('mode', 'copy') == mode:
+            if entry['mtime_ns'] == signature['mtime_ns']:
+                if 'hash' in entry:
+                    signature['hash'] = entry['hash']
+                return signature, False
+            if hash_files:
+                signature['hash'] = file_hash(source)
+                reference_hash = entry['hash'] if 'hash' in entry else file_hash(destination)
+                if signature['hash'] == reference_hash:
+                    return signature, False
+
+    _place_file(source, destination, mode)
+    if hash_files and 'hash' not in signature:
+        signature['hash'] = file_hash(source)
+    return signature, True
+
+
+def sync_files(source_root: Path, destination_root: Path, sources: list, manifest: CopyManifest,
+               hash_files: bool = False, n_workers: int = 8, trust_manifest: bool = True,
+               mode: str = 'copy') -> tuple[int, int]:
+    '''
+    Copy the new and changed files below `source_root` to the same relative paths below `destination_root`.
+
+    Files are compared and copied in a thread pool. The manifest is updated with every file and saved
+    once all files are done, also when a copy fails.
+
+    Args:
+        source_root (Path): Directory the source files are relative to.
+        destination_root (Path): Directory the files are copied into.
+        sources (list): Source files below `source_root`.
+        manifest (CopyManifest): Manifest of the files already in `destination_root`.
+        hash_files (bool): Compare file hashes when the modification time changed but the size did not.
+        n_workers (int): Number of copy threads.
+        trust_manifest (bool): If False, compare against the destination files instead of the manifest.
+        mode (str): Place the files with a ``'copy'``, a ``'hardlink'`` or a ``'symlink'``.
+
+    Returns:
+        tuple[int, int]: The number of copied (or linked) and skipped files.
+
+    Raises:
+        ValueError: If the mode is not supported.
+    '''
+    if mode not in LINK_MODES:
+        raise ValueError(f"Invalid link mode: {mode}. Must be one of {LINK_MODES}")
+    logger = logging.getLogger('glider_ingest')
+    keys = [Path(source).relative_to(source_root).as_posix() for source in sources]
+
+    copied_count = 0
+    skipped_count = 0
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, n_workers)) as executor:
+            futures = {key: executor.submit(_sync_file, Path(source), destination_root / key,
+                                            manifest.entries.get(key), hash_files, trust_manifest, mode)
+                       for key, source in zip(keys, sources)}
+            for key, future in futures.items():
+                manifest.entries[key], copied = future.result()
+                if copied:
+                    logger.debug("Copied %s", key)
+                    copied_count += 1
+                else:
+                    skipped_count += 1
+    finally:
+        manifest.save()
+
+    return copied_count, skipped_count
@@ -202,6 +202,7 @@ def get_default_variables(only_sci_variables:bool = False, only_eng_variables:bo
         units='1',
         valid_max=1.0,
         valid_min=0.0,
+        dtype='float32',
         to_grid=True
     )
 
@@ -219,6 +220,7 @@ def get_default_variables(only_sci_variables:bool = False, only_eng_variables:bo
         units='ppb',
         valid_max=50.0,
         valid_min=0.0,
+        dtype='float32',
         to_grid=True
     )
 
@@ -236,6 +238,7 @@ def get_default_variables(only_sci_variables:bool = False, only_eng_variables:bo
         units='\u03BCg/L',
         valid_max=10.0,
         valid_min=0.0,
+        dtype='float32',
         to_grid=True
     )
 
@@ -253,6 +256,7 @@ def get_default_variables(only_sci_variables:bool = False, only_eng_variables:bo
         units='\u03BCmol/kg',
         valid_max=500.0,
         valid_min=0.0,
+        dtype='float32',
         to_grid=True
     )
 
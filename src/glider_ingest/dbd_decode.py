@@ -0,0 +1,118 @@
+'''
+Module to decode DBD/EBD files in parallel, one file per task.
+'''
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import dbdreader
+import logging
+
+from .segment_cache import SegmentCache, segment_key
+
+
+def _decode_file(filename: str, cache_dir: str, skip_initial_line: bool,
+                 parameters: list) -> list[tuple[np.ndarray, np.ndarray]]:
+    '''
+    Read the time and values of parameters from a single DBD/EBD file.
+
+    Parameters missing from the file get empty arrays, as when reading them with `dbdreader.MultiDBD`.
+
+    Returns:
+        list[tuple[np.ndarray, np.ndarray]]: The time and values of every parameter.
+    '''
+    dbd = dbdreader.DBD(filename, cacheDir=cache_dir, skip_initial_line=skip_initial_line)
+    try:
+        result = dbd.get(*parameters, decimalLatLon=True, discardBadLatLon=True, return_nans=False,
+                         check_for_invalid_parameters=False)
+    finally:
+        dbd.close()
+    return [result] if len(parameters) == 1 else result
+
+
+def _interpolate(time: np.ndarray, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    '''
+    Linearly interpolate values onto a time base, NaN outside the values and for empty values.
+
+    Matches the default interpolation of `dbdreader.MultiDBD.get_sync`.
+    '''
+    if len(x) < 1:
+        return time * np.nan
+    if np.any(np.diff(x) < 0):
+        order = np.argsort(x)
+        x, y = x[order], y[order]
+    return np.interp(time, x, y, left=np.nan, right=np.nan)
+
+
+def get_sync(multi_dbd: dbdreader.MultiDBD, *parameters: str, n_workers: int = 1,
+             cache: SegmentCache|None = None) -> tuple[np.ndarray, ...]:
+    '''
+    Read parameters of every file of a `dbdreader.MultiDBD`, interpolated onto the time base of the first parameter.
+
+    Every file is decoded separately in a process pool, the per-file arrays are joined in the file order
+    of `multi_dbd` and the parameters are then synchronized on the joined arrays. The result matches
+    ``multi_dbd.get_sync(*parameters)``. With a cache only the parameters missing from the cache
+    entry of a file are decoded.
+
+    Args:
+        multi_dbd (dbdreader.MultiDBD): The opened files.
+        *parameters (str): Parameter names, the time base is the one of the first parameter.
+        n_workers (int): Number of decoding processes, the files are decoded in this process if 1.
+        cache (SegmentCache | None): Cache of the decoded columns of every file.
+
+    Returns:
+        tuple[np.ndarray, ...]: The time of the first parameter, its values and the interpolated
+        values of the other parameters.
+    '''
+    logger = logging.getLogger('glider_ingest')
+
+    # Parameters are read from the science files if they hold them, otherwise from the engineering files
+    file_parameters = {'sci': [p for p in parameters if p in multi_dbd.parameterNames['sci']]}
+    file_parameters['eng'] = [p for p in parameters if p in multi_dbd.parameterNames['eng']
+                              and p not in file_parameters['sci']]
+
+    tasks = [(file_type, dbd) for file_type in ['sci', 'eng'] if file_parameters[file_type]
+             for dbd in multi_dbd.dbds[file_type]]
+    columns = [{} for _ in tasks]
+    keys = [None for _ in tasks]
+    if cache is not None:
+        for i, (file_type, dbd) in enumerate(tasks):
+            keys[i] = segment_key(dbd.filename, dbd.headerInfo.get('sensor_list_crc'))
+            columns[i] = cache.load(keys[i], file_parameters[file_type])
+
+    # Decode the parameters that are not cached
+    to_decode = [(i, [p for p in file_parameters[file_type] if p not in columns[i]])
+                 for i, (file_type, _) in enumerate(tasks)]
+    to_decode = [(i, missing) for i, missing in to_decode if missing]
+    arguments = [[tasks[i][1].filename for i, _ in to_decode],
+                 [tasks[i][1].cacheDir for i, _ in to_decode],
+                 [tasks[i][1].skip_initial_line for i, _ in to_decode],
+                 [missing for _, missing in to_decode]]
+    logger.debug("Decoding %d of %d files with %d workers", len(to_decode), len(tasks), n_workers)
+    if n_workers > 1 and len(to_decode) > 1:
+        chunksize = max(1, len(to_decode) // (n_workers * 4))
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            results = list(executor.map(_decode_file, *arguments, chunksize=chunksize))
+    else:
+        results = list(map(_decode_file, *arguments))
+
+    for (i, missing), result in zip(to_decode, results):
+        decoded = dict(zip(missing, result))
+        columns[i].update(decoded)
+        if cache is not None:
+            cache.save(keys[i], decoded)
+    if cache is not None:
+        cache.evict()
+
+    # Join the arrays of every parameter in file order
+    series = {}
+    for file_type in ['sci', 'eng']:
+        file_columns = [columns[i] for i, (task_type, _) in enumerate(tasks) if task_type == file_type]
+        for parameter in file_parameters[file_type]:
+            series[parameter] = (np.hstack([column[parameter][0] for column in file_columns]),
+                                 np.hstack([column[parameter][1] for column in file_columns]))
+
+    empty = (np.array([]), np.array([]))
+    time, values = series.get(parameters[0], empty)
+    synced = [time, values]
+    for parameter in parameters[1:]:
+        synced.append(_interpolate(time, *series.get(parameter, empty)))
+    return tuple(synced)
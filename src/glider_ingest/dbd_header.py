@@ -0,0 +1,139 @@
+'''
+Module to read the ASCII headers of DBD/EBD files and cache them on disk.
+'''
+from attrs import define, field
+from pathlib import Path
+import pandas as pd
+import json
+import logging
+import os
+
+# Header tags kept in the metadata table
+HEADER_TAGS = ['full_filename', 'the8x3_filename', 'fileopen_time', 'sensor_list_crc', 'total_num_sensors']
+
+
+def read_dbd_header(path: Path, max_line_length: int = 1024) -> dict|None:
+    '''
+    Read the ASCII header of a DBD/EBD file without reading any of the binary data.
+
+    The header starts with ``dbd_label``, ``encoding_ver`` and ``num_ascii_tags``, the number of
+    ``key: value`` lines in the header. Reading stops after that many lines.
+
+    Args:
+        path (Path): The file to read.
+        max_line_length (int): Longest header line accepted, longer lines end the header.
+
+    Returns:
+        dict | None: The header tags, None if the file does not start with a DBD header.
+    '''
+    tags = {}
+    n_tags = None
+    with open(path, 'rb') as f:
+        while n_tags is None or len(tags) < n_tags:
+            line = f.readline(max_line_length)
+            if not line.endswith(b'\n'):
+                break
+            key, sep, value = line.decode('ascii', errors='replace').partition(':')
+            if not sep:
+                break
+            tags[key.strip()] = value.strip()
+            if key.strip() == 'num_ascii_tags':
+                try:
+                    n_tags = int(value)
+                except ValueError:
+                    break
+
+    if 'dbd_label' not in tags:
+        return None
+    # Older headers only hold the filename
+    if 'full_filename' not in tags and 'filename' in tags:
+        tags['full_filename'] = tags['filename']
+    return tags
+
+
+@define
+class HeaderCache:
+    '''
+    Header metadata of DBD/EBD files, cached on disk.
+
+    Entries are keyed by file path and hold the size and modification time of the file when its
+    header was read, so only new or changed files are read again.
+
+    Attributes:
+        path (Path | None): Location of the cache file, the cache is only kept in memory if None.
+        entries (dict): Header tags of every file.
+    '''
+    path: Path|None = field(default=None)
+    entries: dict = field(factory=dict)
+
+    @property
+    def logger(self):
+        """Get the logger instance for this cache."""
+        return logging.getLogger('glider_ingest')
+
+    @classmethod
+    def load(cls, path: Path|None) -> 'HeaderCache':
+        '''
+        Load a header cache, starting an empty one if the file does not exist or cannot be read.
+
+        Args:
+            path (Path | None): Location of the cache file.
+
+        Returns:
+            HeaderCache: The loaded cache.
+        '''
+        cache = cls(path)
+        if path is not None and Path(path).exists():
+            try:
+                cache.entries = json.loads(Path(path).read_text())
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                cache.logger.warning("Ignoring unreadable header cache: %s", path)
+        return cache
+
+    def save(self):
+        '''
+        Write the cache, replacing the previous file only once the new one is complete.
+        '''
+        if self.path is None:
+            return
+        path = Path(self.path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + '.tmp')
+        tmp_path.write_text(json.dumps(self.entries, indent=1, sort_keys=True))
+        tmp_path.replace(path)
+
+    def get_metadata(self, files: list) -> pd.DataFrame:
+        '''
+        Get the header metadata of files, reading the headers of new or changed files only.
+
+        Args:
+            files (list): Paths of DBD/EBD files.
+
+        Returns:
+            pd.DataFrame: One row per file indexed by path, with the `HEADER_TAGS` and the file size,
+            sorted by ``fileopen_time`` and ``full_filename``. Files without a header have missing tags.
+        '''
+        rows = []
+        read_count = 0
+        for file in files:
+            key = str(file)
+            stat = os.stat(file)
+            entry = self.entries.get(key)
+            if entry is None or entry['size'] != stat.st_size or entry['mtime_ns'] != stat.st_mtime_ns:
+                tags = read_dbd_header(file) or {}
+                entry = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+                         **{tag: tags.get(tag) for tag in HEADER_TAGS}}
+                self.entries[key] = entry
+                read_count += 1
+            rows.append({'path': key, 'size': entry['size'], **{tag: entry.get(tag) for tag in HEADER_TAGS}})
+
+        if read_count > 0:
+            self.logger.debug("Read %d of %d file headers", read_count, len(rows))
+            self.save()
+
+        metadata = pd.DataFrame(rows, columns=['path', 'size'] + HEADER_TAGS)
+        # Single digit days are padded with an underscore, as in Thu_Feb__1_12:00:00_2024
+        fileopen_time = metadata['fileopen_time'].str.replace('__', '_')
+        metadata['fileopen_time'] = pd.to_datetime(fileopen_time, format='%a_%b_%d_%H:%M:%S_%Y', errors='coerce')
+        metadata['total_num_sensors'] = pd.to_numeric(metadata['total_num_sensors'], errors='coerce')
+        return metadata.sort_values(['fileopen_time', 'full_filename', 'path']).set_index('path')
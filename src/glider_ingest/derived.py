@@ -0,0 +1,154 @@
+'''
+Module containing the registry of derived gridded variables.
+'''
+from attrs import define, field
+from typing import Callable
+import numpy as np
+import gsw
+
+from .variable import Variable
+
+
+@define
+class DerivedVariable:
+    '''
+    A quantity derived from the gridded variables.
+
+    The inputs name `Gridder.data_arrays` keys (``int_*``), other registered quantities, or
+    ``pres`` for the pressure levels. `func` receives the inputs as positional arguments, followed
+    by the `params` taken from the Gridder (such as ``lat``, ``lon`` or ``interval_p``) as keywords,
+    and is only evaluated on the cells where all inputs are valid.
+
+    Quantities without a `variable` are intermediates, shared between the derived variables that
+    use them and not added to the gridded dataset.
+
+    Attributes:
+        name (str): Name of the quantity, the variable name in the gridded dataset for output variables.
+        inputs (list): Names of the input arrays.
+        func (Callable): Vectorized function computing the quantity from its inputs.
+        params (list): Names of the Gridder attributes passed to `func` as keywords.
+        variable (Variable | None): Metadata of the output variable, None for intermediates.
+        per_level (bool): If the quantity only depends on pressure and is computed once per pressure level.
+    '''
+    name: str
+    inputs: list = field(factory=list)
+    func: Callable = field(default=None)
+    params: list = field(factory=list)
+    variable: Variable|None = field(default=None)
+    per_level: bool = field(default=False)
+
+
+DERIVED_VARIABLES = {}
+
+
+def register_derived_variable(derived_variable: DerivedVariable) -> DerivedVariable:
+    '''
+    Add a derived variable to the registry, replacing any registered variable of the same name.
+
+    Args:
+        derived_variable (DerivedVariable): The derived variable to register.
+
+    Returns:
+        DerivedVariable: The registered derived variable.
+    '''
+    DERIVED_VARIABLES[derived_variable.name] = derived_variable
+    return derived_variable
+
+
+def _potential_heat_content(cp, temperature, density, interval_p):
+    phc = interval_p * cp * (temperature - 26) * density
+    phc[phc < 0] = np.nan
+    return phc * 10**-4
+
+
+# TEOS-10 intermediates shared by the derived variables
+register_derived_variable(DerivedVariable(
+    name='sa',
+    inputs=['int_salinity', 'pres'],
+    func=lambda sp, p, lon, lat: gsw.SA_from_SP(sp, p, lon, lat),
+    params=['lon', 'lat']
+))
+register_derived_variable(DerivedVariable(
+    name='pt',
+    inputs=['sa', 'int_temperature', 'pres'],
+    func=gsw.pt0_from_t
+))
+register_derived_variable(DerivedVariable(
+    name='ct',
+    inputs=['sa', 'pt'],
+    func=gsw.CT_from_pt
+))
+register_derived_variable(DerivedVariable(
+    name='cp',
+    inputs=['sa', 'int_temperature', 'pres'],
+    func=lambda sa, t, p: gsw.cp_t_exact(sa, t, p) * 0.001
+))
+
+# Derived variables of the gridded dataset, the resolution is filled in by `generate_variables`
+register_derived_variable(DerivedVariable(
+    name='g_hc',
+    inputs=['cp', 'int_temperature', 'int_density'],
+    func=lambda cp, t, rho, interval_p: interval_p * cp * t * rho * 10**-4,
+    params=['interval_p'],
+    variable=Variable(
+        long_name='Gridded Heat Content',
+        short_name='g_hc',
+        observation_type='calculated',
+        source='g_temp',
+        standard_name='sea_water_heat_content_for_all_grids',
+        units='kJ/cm^2',
+        valid_max=10.0,
+        valid_min=0.0
+    )
+))
+register_derived_variable(DerivedVariable(
+    name='g_phc',
+    inputs=['cp', 'int_temperature', 'int_density'],
+    func=_potential_heat_content,
+    params=['interval_p'],
+    variable=Variable(
+        long_name='Gridded Potential Heat Content',
+        short_name='g_phc',
+        observation_type='calculated',
+        source='g_temp',
+        standard_name='sea_water_heat_content_for_grids_above_26_C',
+        units='kJ/cm^2',
+        valid_max=10.0,
+        valid_min=0.0
+    )
+))
+register_derived_variable(DerivedVariable(
+    name='g_sp',
+    inputs=['sa', 'ct'],
+    func=gsw.spiciness0,
+    variable=Variable(
+        long_name='Gridded Spiciness',
+        short_name='g_sp',
+        observation_type='calculated',
+        source='g_temp',
+        standard_name='spiciness_from_absolute_salinity_and_conservative_temperature_at_0dbar',
+        units='kg/m^3',
+        valid_max=10.0,
+        valid_min=0.0
+    )
+))
+register_derived_variable(DerivedVariable(
+    name='g_depth',
+    inputs=['pres'],
+    func=lambda p, lat: gsw.z_from_p(p, lat, geo_strf_dyn_height=0, sea_surface_geopotential=0),
+    params=['lat'],
+    per_level=True,
+    variable=Variable(
+        long_name='Gridded Depth',
+        short_name='g_depth',
+        observation_type='calculated',
+        source='g_pres',
+        standard_name='sea_water_depth',
+        units='m',
+        valid_max=1000.0,
+        valid_min=0.0
+    )
+))
+
+# Derived variables added to the gridded dataset when none are requested
+DEFAULT_DERIVED_VARIABLES = ['g_hc', 'g_phc', 'g_sp', 'g_depth']
@@ -0,0 +1,187 @@
+'''
+Module containing the FileIndex class.
+'''
+from attrs import define, field
+from pathlib import Path, PurePosixPath
+import json
+import logging
+import os
+
+
+@define
+class FileIndex:
+    '''
+    Index of the files below a directory, built with a single `os.scandir` walk and grouped by card and suffix.
+
+    The card of a file is the first directory below the root it is in, such as ``Flight_card`` or
+    ``Science_card``, and ``''`` for files directly in the root. Every directory is recorded with its
+    modification time, so an on-disk snapshot only needs the directories that changed to be listed again.
+
+    Attributes:
+        root (Path): Directory to index.
+        snapshot_path (Path | None): Location of the on-disk snapshot, no snapshot is kept if None.
+
+    Internal Attributes (initialized later):
+        directories (dict | None): Modification time, file names and subdirectory names of every directory,
+            keyed by the path relative to the root. None until the index is built.
+        files (dict | None): Sorted file paths grouped by card and suffix.
+    '''
+    root: Path
+    snapshot_path: Path|None = field(default=None)
+
+    directories: dict|None = field(init=False, default=None)
+    files: dict|None = field(init=False, default=None)
+
+    @property
+    def logger(self):
+        """Get the logger instance for this index."""
+        return logging.getLogger('glider_ingest')
+
+    def invalidate(self):
+        '''
+        Drop the index, the next query lists the directories again.
+
+        The snapshot is kept, its unchanged directories are still reused.
+        '''
+        self.directories = None
+        self.files = None
+
+    def _load_snapshot(self) -> dict:
+        '''
+        Read the directory records of the snapshot, an empty dict if there is no readable snapshot.
+        '''
+        if self.snapshot_path is None or not Path(self.snapshot_path).exists():
+            return {}
+        try:
+            snapshot = json.loads(Path(self.snapshot_path).read_text())
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            self.logger.warning("Ignoring unreadable file index snapshot: %s", self.snapshot_path)
+            return {}
+        if snapshot.get('root') != str(self.root):
+            return {}
+        return snapshot.get('directories', {})
+
+    def _save_snapshot(self):
+        '''
+        Write the directory records to the snapshot.
+        '''
+        snapshot_path = Path(self.snapshot_path)
+        snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = snapshot_path.with_name(snapshot_path.name + '.tmp')
+        tmp_path.write_text(json.dumps({'root': str(self.root), 'directories': self.directories}))
+        tmp_path.replace(snapshot_path)
+
+    def build(self):
+        '''
+        Walk the directory tree, reusing the snapshot records of directories whose modification time is unchanged.
+        '''
+        root = Path(self.root)
+        previous = self._load_snapshot()
+        directories = {}
+        listed_count = 0
+
+        stack = ['.']
+        while stack:
+            relative_dir = stack.pop()
+            directory = root / relative_dir
+            try:
+                mtime_ns = directory.stat().st_mtime_ns
+            except OSError:
+                continue
+
+            record = previous.get(relative_dir)
+            if record is None or record['mtime_ns'] != mtime_ns:
+                record = {'mtime_ns': mtime_ns, 'files': [], 'dirs': []}
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            record['dirs'].append(entry.name)
+                        else:
+                            record['files'].append(entry.name)
+                listed_count += 1
+
+            directories[relative_dir] = record
+            stack.extend(os.path.normpath(os.path.join(relative_dir, name)) for name in record['dirs'])
+
+        self.directories = directories
+        self.logger.debug("Indexed %d directories below %s, %d listed", len(directories), root, listed_count)
+
+        # Group the files by card and suffix
+        files = {}
+        for relative_dir, record in directories.items():
+            card = '' if relative_dir == '.' else Path(relative_dir).parts[0]
+            for name in record['files']:
+                path = os.path.join(root, relative_dir, name) if relative_dir != '.' else os.path.join(root, name)
+                files.setdefault(card, {}).setdefault(os.path.splitext(name)[1], []).append(path)
+        for card_files in files.values():
+            for paths in card_files.values():
+                paths.sort()
+        self.files = files
+
+        if self.snapshot_path is not None:
+            self._save_snapshot()
+
+    def _relative_prefix(self, directory: Path) -> str|None:
+        '''
+        Path prefix of the entries below a directory inside the root, None for the root itself.
+        '''
+        relative_dir = Path(directory).relative_to(self.root)
+        if relative_dir == Path('.'):
+            return None
+        return os.path.join(self.root, relative_dir) + os.sep
+
+    def find_directories(self, patterns: list[str]|None = None, directory: Path|None = None) -> list[Path]:
+        '''
+        Get the indexed directories below the root, building the index on first use.
+
+        Args:
+            patterns (list[str] | None): Only return directories whose path ends with one of these
+                patterns (e.g. ['LOGS', 'STATE/CACHE']), see `PurePath.match`.
+            directory (Path | None): Only return this directory and the directories below it.
+
+        Returns:
+            list[Path]: The sorted matching directories.
+        '''
+        if self.directories is None:
+            self.build()
+
+        relative_dirs = [relative_dir for relative_dir in self.directories if relative_dir != '.']
+        if patterns is not None:
+            relative_dirs = [relative_dir for relative_dir in relative_dirs
+                             if any(PurePosixPath(Path(relative_dir).as_posix()).match(pattern) for pattern in patterns)]
+        paths = [Path(self.root) / relative_dir for relative_dir in relative_dirs]
+
+        if directory is not None:
+            prefix = self._relative_prefix(directory)
+            if prefix is not None:
+                paths = [path for path in paths if str(path) + os.sep == prefix or str(path).startswith(prefix)]
+        return sorted(paths)
+
+    def get_files(self, extensions: list[str]|None = None, directory: Path|None = None,
+                  card: str|None = None) -> list[str]:
+        '''
+        Get the indexed files with the given extensions, building the index on first use.
+
+        Args:
+            extensions (list[str] | None): File extensions to match (e.g. ['.dbd', '.DBD']), all files if None.
+            directory (Path | None): Only return files below this directory, inside the root.
+            card (str | None): Only return files of this card.
+
+        Returns:
+            list[str]: The sorted matching file paths.
+        '''
+        if self.files is None:
+            self.build()
+
+        cards = [card] if card is not None else list(self.files)
+        paths = []
+        for card_name in cards:
+            card_files = self.files.get(card_name, {})
+            for extension in (card_files if extensions is None else extensions):
+                paths.extend(card_files.get(extension, []))
+
+        if directory is not None:
+            prefix = self._relative_prefix(directory)
+            if prefix is not None:
+                paths = [path for path in paths if path.startswith(prefix)]
+        return sorted(paths)
@@ -1,6 +1,21 @@
+from attrs import evolve
+
 from .variable import Variable
+from .derived import DERIVED_VARIABLES
+
+def generate_variables(interval_h, interval_p, derived_variables=None):
+    '''
+    Generate the metadata of the gridded variables.
 
-def generate_variables(interval_h, interval_p):
+    Args:
+        interval_h (int | float): Time interval (in hours) of the grid.
+        interval_p (int | float): Pressure interval (in decibars) of the grid.
+        derived_variables (list | None): DerivedVariables whose metadata is added, all registered
+            derived variables if None.
+
+    Returns:
+        dict: Variables keyed by their short name.
+    '''
     g_temperature = Variable(
         long_name='Gridded Temperature',
         short_name='g_temperature',
@@ -97,57 +112,21 @@ def generate_variables(interval_h, interval_p):
         valid_min=0.0
     )
 
-    g_hc = Variable(
-        long_name='Gridded Heat Content',
-        short_name='g_hc',
-        observation_type='calculated',
-        source='g_temp',
-        resolution=str(interval_h)+'hour and '+str(interval_p)+'dbar',
-        standard_name='sea_water_heat_content_for_all_grids',
-        units='kJ/cm^2',
-        valid_max=10.0,
-        valid_min=0.0
-    )
-
-    g_phc = Variable(
-        long_name='Gridded Potential Heat Content',
-        short_name='g_phc',
-        observation_type='calculated',
-        source='g_temp',
-        resolution=str(interval_h)+'hour and '+str(interval_p)+'dbar',
-        standard_name='sea_water_heat_content_for_grids_above_26_C',
-        units='kJ/cm^2',
-        valid_max=10.0,
-        valid_min=0.0
-    )
-
-    g_sp = Variable(
-        long_name='Gridded Spiciness',
-        short_name='g_sp',
-        observation_type='calculated',
-        source='g_temp',
-        resolution=str(interval_h)+'hour and '+str(interval_p)+'dbar',
-        standard_name='spiciness_from_absolute_salinity_and_conservative_temperature_at_0dbar',
-        units='kg/m^3',
-        valid_max=10.0,
-        valid_min=0.0
-    )
-
-    g_depth = Variable(
-        long_name='Gridded Depth',
-        short_name='g_depth',
-        observation_type='calculated',
-        source='g_pres',
-        resolution=str(interval_h)+'hour and '+str(interval_p)+'dbar',
-        standard_name='sea_water_depth',
-        units='m',
-        valid_max=1000.0,
-        valid_min=0.0
-    )
-
     # Create a list of variables that we initilized above
     variables = [g_temperature, g_salinity, g_conductivity, g_density, g_turbidity,
-                 g_cdom, g_chlorophyll, g_oxygen, g_hc, g_phc, g_sp, g_depth]
+                 g_cdom, g_chlorophyll, g_oxygen]
+
+    # Add the metadata of the derived variables, copied so the registry is left untouched
+    if derived_variables is None:
+        derived_variables = DERIVED_VARIABLES.values()
+    for derived_variable in derived_variables:
+        if derived_variable.variable is None:
+            continue
+        variable = evolve(derived_variable.variable)
+        if variable.resolution is None:
+            variable.resolution = str(interval_h)+'hour and '+str(interval_p)+'dbar'
+        variables.append(variable)
+
     # Create a dictionary of variables that we initilized above
     attrs_dict = {value.short_name:value for value in variables}
     return attrs_dict
@@ -1,13 +1,236 @@
 '''
 Module containing the Gridder class.
 '''
-from attrs import define, field
+from attrs import define, evolve, field, fields
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import partial
+from multiprocessing import shared_memory
+from pathlib import Path
 import numpy as np
 import pandas as pd
 import xarray as xr
-import gsw
 import logging
 
+from .utils import find_profiles, write_netcdf_rows, TIME_ENCODING
+from .derived import DERIVED_VARIABLES, DEFAULT_DERIVED_VARIABLES
+
+
+def _bin_offsets(time: np.ndarray, edges: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    '''
+    Compute the sample offsets of every time bin in a single pass.
+
+    Bin ``i`` spans ``edges[i]`` to ``edges[i+1]`` with both ends inclusive, matching a
+    label based ``sel(time=slice(...))`` on the sorted time axis.
+
+    Args:
+        time (np.ndarray): Sorted sample times.
+        edges (np.ndarray): Sorted bin edges.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Start (inclusive) and stop (exclusive) offsets of each bin.
+    '''
+    starts = np.searchsorted(time, edges[:-1], side='left')
+    stops = np.searchsorted(time, edges[1:], side='right')
+    return starts, stops
+
+
+def _interp_block(x: np.ndarray, values: np.ndarray, xi: np.ndarray) -> np.ndarray:
+    '''
+    Linearly interpolate a stacked block of variables onto new coordinates in one call.
+
+    Each row is interpolated with ``np.interp``, so NaN samples only affect the row they
+    belong to and the result is identical to interpolating every variable separately.
+
+    Args:
+        x (np.ndarray): Increasing sample coordinates of length n.
+        values (np.ndarray): Sample values with shape (m, n), one row per variable.
+        xi (np.ndarray): Coordinates to interpolate onto.
+
+    Returns:
+        np.ndarray: Interpolated values with shape (m, len(xi)), NaN outside the range of `x`.
+    '''
+    out = np.empty((values.shape[0], len(xi)))
+    for k, row in enumerate(values):
+        out[k] = np.interp(xi, x, row, left=np.nan, right=np.nan)
+    return out
+
+
+def _resolve_pressure_duplicates(pres: np.ndarray) -> np.ndarray:
+    '''
+    Make pressure values unique by adding tiny offsets to duplicates.
+
+    Steps:
+        - Sort the pressure values so duplicates form contiguous runs
+        - Rank every value within its run
+        - Add an offset of ``1e-12 * rank`` to every value in a run of duplicates
+
+    Args:
+        pres (np.ndarray): Pressure values.
+
+    Returns:
+        np.ndarray: Pressure values with duplicates made unique.
+    '''
+    pres = pres.copy()
+    if len(pres) < 2:
+        return pres
+
+    order = np.argsort(pres, kind='stable')
+    sorted_pres = pres[order]
+
+    # Index of the first value of each run, carried forward over the run.
+    positions = np.arange(len(sorted_pres))
+    run_start = np.r_[True, sorted_pres[1:] != sorted_pres[:-1]]
+    rank = positions - np.maximum.accumulate(np.where(run_start, positions, 0))
+
+    # Values belonging to a run of more than one value.
+    run_end = np.r_[run_start[1:], True]
+    duplicated = ~(run_start & run_end)
+
+    if duplicated.any():
+        pres[order[duplicated]] = sorted_pres[duplicated] + 0.000000000001 * rank[duplicated]
+
+    return pres
+
+
+def _grid_bins(pres: np.ndarray, values: np.ndarray, starts: np.ndarray, stops: np.ndarray,
+               int_pres: np.ndarray, out) -> int:
+    '''
+    Grid a run of time bins onto the pressure grid.
+
+    Steps:
+        - Slice each bin out of the sorted arrays using its sample offsets
+        - Sort the slice by pressure and make the pressure values unique
+        - Interpolate all variables of the slice onto the pressure grid in one call
+
+    Args:
+        pres (np.ndarray): Pressure of every sample, sorted by time.
+        values (np.ndarray): Gridded variables with shape (m, n), sorted by time.
+        starts, stops (np.ndarray): Sample offsets of each bin.
+        int_pres (np.ndarray): Pressure grid.
+        out: Sequence of m arrays with shape (len(starts), len(int_pres)) to write into.
+
+    Returns:
+        int: The number of non-empty bins.
+    '''
+    processed = 0
+    for row, (start, stop) in enumerate(zip(starts, stops)):
+        # Skip empty time slices, the output is already filled with NaN
+        if stop <= start:
+            continue
+        order = np.argsort(pres[start:stop], kind='stable')
+        slice_pres = _resolve_pressure_duplicates(pres[start:stop][order])
+        gridded = _interp_block(slice_pres, values[:, start:stop][:, order], int_pres)
+        for k, array in enumerate(out):
+            array[row] = gridded[k]
+        processed += 1
+    return processed
+
+
+def _evaluate_valid(func, shape: tuple, *arrays, chunk_size: int = 1_000_000) -> np.ndarray:
+    '''
+    Evaluate an element-wise function only on the cells where all inputs are valid.
+
+    The valid cells are gathered into 1-D arrays, evaluated in chunks of at most
+    `chunk_size` cells and scattered back into a NaN filled result.
+
+    Args:
+        func (callable): Element-wise function taking one argument per input array.
+        shape (tuple): Shape (rows, levels) of the grid.
+        *arrays (np.ndarray): Input arrays, either of the grid shape or 1-D with one value per level.
+        chunk_size (int): Maximum number of cells evaluated per call of `func`.
+
+    Returns:
+        np.ndarray: The result with the grid shape, NaN where any input is NaN.
+    '''
+    valid = np.ones(shape, dtype=bool)
+    for array in arrays:
+        valid &= np.isfinite(array)
+    cells = np.flatnonzero(valid)
+
+    out = np.full(shape, np.nan)
+    flat_out = out.reshape(-1)
+    for first in range(0, len(cells), chunk_size):
+        chunk = cells[first:first + chunk_size]
+        inputs = [array[chunk % shape[1]] if array.ndim == 1 else array.reshape(-1)[chunk]
+                  for array in arrays]
+        flat_out[chunk] = func(*inputs)
+    return out
+
+
+def _round_time_bounds(first_time, last_time, interval_h) -> tuple[pd.Timestamp, pd.Timestamp]:
+    '''
+    Round the first and last sample time down to the time interval within their hour of the day.
+
+    Args:
+        first_time, last_time (np.datetime64): First and last sample time.
+        interval_h (int | float): Time interval (in hours).
+
+    Returns:
+        tuple[pd.Timestamp, pd.Timestamp]: The first and last time edge.
+    '''
+    start_hour = int(pd.to_datetime(first_time).hour / interval_h) * interval_h
+    end_hour = int(pd.to_datetime(last_time).hour / interval_h) * interval_h
+    start_time = pd.to_datetime(first_time).replace(hour=start_hour, minute=0, second=0)
+    end_time = pd.to_datetime(last_time).replace(hour=end_hour, minute=0, second=0)
+    return start_time, end_time
+
+
+def _coarsen(values: np.ndarray, rows: np.ndarray, cols: np.ndarray, shape: tuple,
+             weights: np.ndarray|None = None) -> tuple[np.ndarray, np.ndarray]:
+    '''
+    Average the valid cells of a fine grid onto a coarser grid.
+
+    Args:
+        values (np.ndarray): Fine grid values with shape (m, n).
+        rows (np.ndarray): Coarse row of each of the m fine rows, -1 drops the row.
+        cols (np.ndarray): Coarse column of each of the n fine columns, -1 drops the column.
+        shape (tuple): Shape of the coarse grid.
+        weights (np.ndarray | None): Weight of every fine cell, each valid cell has weight 1 if None.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: The (weighted) mean and the total weight of every coarse cell.
+    '''
+    valid = (rows[:, np.newaxis] >= 0) & (cols[np.newaxis, :] >= 0) & np.isfinite(values)
+    cells = (rows[:, np.newaxis] * shape[1] + cols[np.newaxis, :])[valid]
+    weights = np.ones(np.count_nonzero(valid)) if weights is None else weights[valid]
+
+    n_cells = shape[0] * shape[1]
+    totals = np.bincount(cells, weights=weights, minlength=n_cells)
+    sums = np.bincount(cells, weights=weights * values[valid], minlength=n_cells)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = sums / totals
+    return means.reshape(shape), totals.reshape(shape)
+
+
+def _grid_bins_shared(blocks: dict, starts: np.ndarray, stops: np.ndarray,
+                      int_pres: np.ndarray, first: int, last: int) -> int:
+    '''
+    Worker entry point that grids rows ``first`` to ``last`` of shared memory arrays.
+
+    Args:
+        blocks (dict): Maps ``pres``, ``values`` and ``out`` to ``(name, shape)`` of their shared memory block.
+        starts, stops (np.ndarray): Sample offsets of every bin.
+        int_pres (np.ndarray): Pressure grid.
+        first, last (int): Range of bins to grid.
+
+    Returns:
+        int: The number of non-empty bins.
+    '''
+    # Pool workers share the parent's resource tracker, which unlinks the blocks.
+    attached = {key: shared_memory.SharedMemory(name=name) for key, (name, shape) in blocks.items()}
+    arrays = {}
+    try:
+        for key, shm in attached.items():
+            arrays[key] = np.ndarray(blocks[key][1], dtype=float, buffer=shm.buf)
+        return _grid_bins(arrays['pres'], arrays['values'], starts[first:last], stops[first:last],
+                          int_pres, arrays['out'][:, first:last])
+    finally:
+        # The views must be released before the blocks can be closed.
+        arrays.clear()
+        for shm in attached.values():
+            shm.close()
+
+
 @define
 class Gridder:
     '''
@@ -23,19 +246,50 @@ class Gridder:
         ds_mission (xr.Dataset): The input mission dataset to process.
         interval_h (int | float): Time interval (in hours) for gridding.
         interval_p (int | float): Pressure interval (in decibars) for gridding.
+        n_workers (int): Number of worker processes used to grid the time bins, 1 grids in this process.
+        method (str): Gridding method, ``'interp'`` interpolates every time bin onto the pressure grid,
+            ``'bin_mean'`` averages the observations falling in each (time, pressure) cell and ``'profile'``
+            interpolates every dive and climb onto the pressure grid along a ``profile`` dimension.
+        profile_hysteresis (int | float): Pressure reversals (in decibars) ignored when detecting profiles.
+        profile_min_extent (int | float): Minimum vertical extent (in decibars) of a detected profile.
+        derived_variables (list | None): Registered names or `DerivedVariable` instances of the derived variables
+            to compute, None computes heat content, potential heat content, spiciness and depth.
+        resolutions (list | None): ``(interval_h, interval_p)`` pairs to grid in one pass with `create_gridded_datasets`.
+            The finest pair replaces `interval_h` and `interval_p` and the coarser ones, integer multiples of the
+            finest, are averaged from the finest grid.
+        max_pressure (int | float | None): Upper bound of the pressure grid, the maximum observed pressure if None.
+        time_bounds (tuple | None): First and last edge of the time grid, the data range rounded down to the
+            interval if None. Fixing both keeps the grids of separately gridded time windows aligned.
+        position (tuple | None): Mean (latitude, longitude) used by the derived variables, the mean position
+            of the dataset if None. Fixing it keeps separately gridded time windows consistent.
 
     Internal Attributes (initialized later):
         ds (xr.Dataset): A copy of the mission dataset with NaN pressures removed.
         variable_names (list): List of variable names in the dataset.
         time, pres (np.ndarray): Arrays of time and pressure values.
         lat, lon (np.ndarray): Mean latitude and longitude of the dataset.
-        grid_pres, grid_time (np.ndarray): Pressure and time grids for interpolation.
-        data_arrays (dict): Dictionary of initialized gridded variables.
+        grid_pres, grid_time (np.ndarray): Read-only broadcast views of the pressure and time grids.
+        bin_starts, bin_stops (np.ndarray): Sample offsets of each time bin (or profile) into the sorted time axis.
+        profile_time, profile_lat, profile_lon, profile_direction (np.ndarray): Mid time, mean position and
+            direction (1 dive, -1 climb) of every profile, set by ``'profile'``.
+        populated_rows (np.ndarray): Indexes of the grid rows containing observations.
+        data_arrays (dict): Dictionary of gridded variables, holding only the populated rows (see `dense_array`).
+        data_counts, data_std (dict): Observation count and standard deviation of every populated cell, filled by ``'bin_mean'``.
     '''
 
     ds_mission: xr.Dataset
     interval_h: int | float = field(default=1)  # Time interval for gridding in hours.
     interval_p: int | float = field(default=0.1)  # Pressure interval for gridding in decibars.
+    n_workers: int = field(default=1)  # Number of worker processes used for gridding.
+    method: str = field(default='interp')  # Gridding method, 'interp', 'bin_mean' or 'profile'.
+    profile_hysteresis: int | float = field(default=1)  # Pressure reversals ignored when detecting profiles in decibars.
+    profile_min_extent: int | float = field(default=10)  # Minimum vertical extent of a profile in decibars.
+    derived_variables: list|None = field(default=None)  # Names or DerivedVariables to compute, None for the defaults.
+    resolutions: list|None = field(default=None)  # (interval_h, interval_p) pairs gridded in one pass.
+    max_pressure: int | float | None = field(default=None)  # Upper bound of the pressure grid in decibars.
+    time_bounds: tuple|None = field(default=None)  # First and last time edge of the grid.
+    position: tuple|None = field(default=None)  # Mean (latitude, longitude), the mean of the dataset if None.
+    _finer_grid: 'Gridder|None' = field(default=None, repr=False, eq=False)  # Gridder a coarse grid is averaged from.
 
     # Attributes initialized post-construction.
     ds: xr.Dataset = field(init=False)
@@ -49,9 +303,18 @@ class Gridder:
     yy: int = field(init=False)
     int_time: np.ndarray = field(init=False)
     int_pres: np.ndarray = field(init=False)
+    populated_rows: np.ndarray = field(init=False)
     data_arrays: dict = field(init=False)
+    data_counts: dict = field(init=False, factory=dict)
+    data_std: dict = field(init=False, factory=dict)
     grid_pres: np.ndarray = field(init=False)
     grid_time: np.ndarray = field(init=False)
+    bin_starts: np.ndarray = field(init=False)
+    bin_stops: np.ndarray = field(init=False)
+    profile_time: np.ndarray|None = field(init=False, default=None)
+    profile_lat: np.ndarray|None = field(init=False, default=None)
+    profile_lon: np.ndarray|None = field(init=False, default=None)
+    profile_direction: np.ndarray|None = field(init=False, default=None)
 
     @property
     def logger(self):
@@ -63,9 +326,23 @@ class Gridder:
         Initializes the Gridder class by copying the mission dataset, filtering valid pressures,
         extracting dataset dimensions, and initializing the time-pressure grid.
         '''
+        # The finest resolution is gridded, the coarser ones are averaged from it.
+        if self.resolutions is not None:
+            self._validate_resolutions()
+            self.interval_h, self.interval_p = min(h for h, _ in self.resolutions), min(p for _, p in self.resolutions)
+
         self.logger.info("Initializing Gridder with intervals: %dh time, %.1f dbar pressure",
                         self.interval_h, self.interval_p)
 
+        valid_methods = ['interp', 'bin_mean', 'profile']
+        if self.method not in valid_methods:
+            raise ValueError(f"Invalid gridding method: {self.method}. Must be one of {valid_methods}")
+
+        # Coarse grids share the prepared dataset of the finer grid, see `_coarsen_grid`.
+        if self._finer_grid is not None:
+            self._average_finer_grid()
+            return
+
         self.ds = self.ds_mission.copy()
         initial_time_points = len(self.ds.time)
         self.logger.debug("Initial dataset contains %d time points", initial_time_points)
@@ -80,6 +357,11 @@ class Gridder:
         # Select times corresponding to valid pressures.
         self.ds = self.ds.isel(time=tloc_idx)
 
+        # Time bins are located with searchsorted, which requires a sorted time axis.
+        if not np.all(np.diff(self.ds.time.values) >= np.timedelta64(0)):
+            self.logger.debug("Sorting dataset by time")
+            self.ds = self.ds.sortby('time')
+
         # Extract variable names and time/pressure values.
         self.variable_names = list(self.ds.data_vars.keys())
         self.logger.debug("Dataset variables: %s", self.variable_names)
@@ -94,13 +376,34 @@ class Gridder:
         self.logger.debug("Time range: %s - %s", pd.to_datetime(time_range[0]), pd.to_datetime(time_range[1]))
 
         # Calculate mean latitude and longitude.
-        self.lon = np.nanmean(self.ds_mission.longitude.values)
-        self.lat = np.nanmean(self.ds_mission.latitude.values)
+        if self.position is not None:
+            self.lat, self.lon = self.position
+        else:
+            self.lon = np.nanmean(self.ds_mission.longitude.values)
+            self.lat = np.nanmean(self.ds_mission.latitude.values)
         self.logger.debug("Mean position: %.4f°N, %.4f°E", self.lat, self.lon)
 
         # Initialize the time-pressure grid.
         self.initalize_grid()
 
+    def _validate_resolutions(self):
+        '''
+        Ensures that every resolution is an integer multiple of the finest one.
+
+        Raises:
+            ValueError: If no resolution is given or a resolution cannot be averaged from the finest grid.
+        '''
+        if len(self.resolutions) == 0:
+            raise ValueError('At least one (interval_h, interval_p) resolution is required')
+        finest_h = min(h for h, _ in self.resolutions)
+        finest_p = min(p for _, p in self.resolutions)
+        for interval_h, interval_p in self.resolutions:
+            for interval, finest in [(interval_h, finest_h), (interval_p, finest_p)]:
+                ratio = round(interval / finest)
+                if ratio < 1 or not np.isclose(ratio * finest, interval):
+                    raise ValueError(f'Resolution {(interval_h, interval_p)} is not an integer multiple '
+                                     f'of the finest resolution {(finest_h, finest_p)}')
+
     def check_len(self, values, expected_length):
         '''
         Ensures that the length of the input array is greater than the expected length.
@@ -130,37 +433,35 @@ class Gridder:
         '''
         self.logger.info("Creating time-pressure grid")
 
-        # Define the start and end times rounded to the nearest interval.
-        start_hour = int(pd.to_datetime(self.time[0]).hour / self.interval_h) * self.interval_h
-        end_hour = int(pd.to_datetime(self.time[-1]).hour / self.interval_h) * self.interval_h
-        start_time = pd.to_datetime(self.time[0]).replace(hour=start_hour, minute=0, second=0)
-        end_time = pd.to_datetime(self.time[-1]).replace(hour=end_hour, minute=0, second=0)
-
-        self.logger.debug("Grid time bounds: %s to %s", start_time, end_time)
-
-        # Generate an array of evenly spaced time intervals.
-        self.int_time = np.arange(
-            start_time,
-            end_time + np.timedelta64(int(self.interval_h), 'h'),
-            np.timedelta64(int(self.interval_h), 'h')
-        ).astype('datetime64[ns]')
+        self.int_time = self._time_edges(self.interval_h)
 
         self.logger.info("Created %d time intervals with %dh spacing", len(self.int_time), self.interval_h)
 
+        # Locate the samples of every time bin at once.
+        self.bin_starts, self.bin_stops = _bin_offsets(self.time, self.int_time)
+
         # Create evenly spaced pressure intervals.
         start_pres = 0  # Start pressure in dbar.
-        end_pres = np.nanmax(self.pres)  # Maximum pressure in dataset.
+        end_pres = np.nanmax(self.pres) if self.max_pressure is None else self.max_pressure  # Maximum pressure in dataset.
         self.int_pres = np.arange(start_pres, end_pres, self.interval_p)
 
         self.logger.debug("Created %d pressure levels from %.1f to %.1f dbar (%.1f dbar spacing)",
                         len(self.int_pres), start_pres, end_pres, self.interval_p)
 
-        # Generate the pressure-time grid using a meshgrid.
-        self.grid_pres, self.grid_time = np.meshgrid(self.int_pres, self.int_time[1:])
-        self.xx, self.yy = np.shape(self.grid_pres)  # Dimensions of the grid.
+        # Profiles replace the time bins as the rows of the grid.
+        if self.method == 'profile':
+            self._initialize_profiles()
+            row_time = self.profile_time
+        else:
+            row_time = self.int_time[1:]
 
-        self.logger.debug("Grid dimensions: %d time x %d pressure = %d total points",
-                        self.xx, self.yy, self.xx * self.yy)
+        # Broadcast views of the pressure-time grid, no full size copies are made.
+        self.xx, self.yy = len(row_time), len(self.int_pres)  # Dimensions of the grid.
+        self.grid_pres = np.broadcast_to(self.int_pres, (self.xx, self.yy))
+        self.grid_time = np.broadcast_to(row_time[:, np.newaxis], (self.xx, self.yy))
+
+        self.logger.debug("Grid dimensions: %d %s x %d pressure = %d total points",
+                        self.xx, self._row_dim, self.yy, self.xx * self.yy)
 
         # Initialize variables for grid interpolation.
         gridded_vars = [varname for varname in self.variable_names
@@ -170,16 +471,127 @@ class Gridder:
         self.logger.debug("Variables not gridded: %s",
                          [v for v in self.variable_names if v not in gridded_vars])
 
-        var_names = [f'int_{varname}' for varname in gridded_vars]
+        # Rows without any observations stay NaN, so only the populated rows are stored.
+        self.populated_rows = np.flatnonzero(self.bin_stops > self.bin_starts)
+        self.logger.debug("%d of %d grid rows contain observations", len(self.populated_rows), self.xx)
 
-        # Initialize data arrays with NaN values
+        # Initialize data arrays with NaN values, in the floating point dtype of their variable
         self.data_arrays = {
-            var: np.full((self.xx, self.yy), np.nan)
-            for var in var_names
+            f'int_{varname}': np.full((len(self.populated_rows), self.yy), np.nan, dtype=self._grid_dtype(varname))
+            for varname in gridded_vars
         }
 
         self.logger.debug("Initialized %d data arrays for interpolation", len(self.data_arrays))
 
+    def _grid_dtype(self, varname) -> np.dtype:
+        '''
+        Storage dtype of a gridded variable, the dtype of the variable if it is floating point, float64 otherwise.
+        '''
+        dtype = self.ds[varname].dtype
+        return dtype if np.issubdtype(dtype, np.floating) else np.dtype('float64')
+
+    def _time_edges(self, interval_h) -> np.ndarray:
+        '''
+        Evenly spaced time bin edges from the start to the end of the data, rounded down to the interval.
+
+        Args:
+            interval_h (int | float): Time interval (in hours) of the bins.
+
+        Returns:
+            np.ndarray: The bin edges.
+        '''
+        if self.time_bounds is not None:
+            start_time, end_time = pd.to_datetime(self.time_bounds[0]), pd.to_datetime(self.time_bounds[1])
+        else:
+            start_time, end_time = _round_time_bounds(self.time[0], self.time[-1], interval_h)
+
+        self.logger.debug("Grid time bounds: %s to %s", start_time, end_time)
+
+        # Generate an array of evenly spaced time intervals.
+        return np.arange(
+            start_time,
+            end_time + np.timedelta64(int(interval_h), 'h'),
+            np.timedelta64(int(interval_h), 'h')
+        ).astype('datetime64[ns]')
+
+    def dense_array(self, values, fill_value=np.nan):
+        '''
+        Expand an array holding only the populated rows to the full grid.
+
+        Args:
+            values (str | np.ndarray): A `data_arrays` key or an array with one row per populated row.
+            fill_value (float): Value of the rows without observations.
+
+        Returns:
+            np.ndarray: Array with shape (xx, yy).
+        '''
+        if isinstance(values, str):
+            values = self.data_arrays[values]
+        dense = np.full((self.xx, self.yy), fill_value, dtype=np.result_type(values, fill_value))
+        dense[self.populated_rows] = values
+        return dense
+
+
+    @property
+    def _row_dim(self) -> str:
+        """Name of the row dimension of the gridded dataset."""
+        return 'profile' if self.method == 'profile' else 'g_time'
+
+    def _grid_coords(self) -> list:
+        """Coordinates of the gridded variables."""
+        if self.method == 'profile':
+            return [('profile', np.arange(self.xx)), ('g_pres', self.int_pres)]
+        return [('g_time', self.int_time[1:]), ('g_pres', self.int_pres)]
+
+    def _initialize_profiles(self):
+        '''
+        Detect the dive and climb profiles and use them as the rows of the grid.
+
+        The profile sample offsets replace the time bin offsets, and the mid time and mean
+        position of every profile are stored for the ``profile`` coordinates.
+        '''
+        self.bin_starts, self.bin_stops, self.profile_direction = find_profiles(
+            self.pres, hysteresis=self.profile_hysteresis, min_extent=self.profile_min_extent)
+        self.check_len(self.bin_starts, 0)  # Ensure there is at least one profile to grid.
+        self.logger.info("Detected %d profiles (%d dives, %d climbs)", len(self.bin_starts),
+                        np.count_nonzero(self.profile_direction > 0), np.count_nonzero(self.profile_direction < 0))
+
+        first, last = self.bin_starts, self.bin_stops - 1
+        self.profile_time = self.time[first] + (self.time[last] - self.time[first]) / 2
+
+        self.profile_lat = self._profile_mean(self._values_on_time('latitude'))
+        self.profile_lon = self._profile_mean(self._values_on_time('longitude'))
+
+    def _values_on_time(self, varname) -> np.ndarray:
+        '''
+        Values of a variable at the samples of the sorted, valid pressure time axis.
+
+        Variables along another time dimension, such as the position along ``m_time``, are not filtered
+        or sorted with the time axis, so they are linearly interpolated onto it, ignoring their NaN values.
+        '''
+        variable = self.ds[varname]
+        if variable.dims == ('time',):
+            return variable.values
+        times = self.ds[variable.dims[0]].values.astype('datetime64[ns]')
+        values = variable.values.astype(float)
+        valid = ~np.isnan(values) & ~np.isnat(times)
+        if not valid.any():
+            return np.full(len(self.time), np.nan)
+        order = np.argsort(times[valid], kind='stable')
+        return np.interp(self.time.astype('datetime64[ns]').astype('int64'),
+                         times[valid][order].astype('int64'), values[valid][order], left=np.nan, right=np.nan)
+
+    def _profile_mean(self, values):
+        '''
+        Mean of a variable over every profile from cumulative sums, ignoring NaN values.
+        '''
+        values = values.astype(float)
+        valid = ~np.isnan(values)
+        sums = np.r_[0, np.cumsum(np.where(valid, values, 0))]
+        counts = np.r_[0, np.cumsum(valid)]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return ((sums[self.bin_stops] - sums[self.bin_starts]) /
+                    (counts[self.bin_stops] - counts[self.bin_starts]))
 
     def add_attrs(self):
         '''
@@ -191,7 +603,7 @@ class Gridder:
         self.logger.debug("Adding metadata attributes to gridded variables")
 
         from .gridded_attrs import generate_variables
-        variables = generate_variables(self.interval_h,self.interval_p)
+        variables = generate_variables(self.interval_h,self.interval_p,self._requested_derived_variables())
 
         attrs_added = 0
         for var_short_name,variable in variables.items():
@@ -202,188 +614,262 @@ class Gridder:
 
         self.logger.info("Added metadata attributes to %d variables", attrs_added)
 
-    def _process_time_slice(self, tds):
-        """
-        Process a single time slice of data.
-
-        Steps:
-            - Sort data by pressure
-            - Replace time coordinate with pressure values for interpolation
-        """
-        if len(tds.time) == 0:
-            self.logger.debug("Empty time slice encountered")
-            return tds
-
-        initial_points = len(tds.time)
-        pressure_range = (tds.pressure.min().values, tds.pressure.max().values)
-        self.logger.debug("Processing time slice with %d points, pressure range: %.2f-%.2f dbar",
-                         initial_points, pressure_range[0], pressure_range[1])
-
-        tds = tds.sortby('pressure')
-        # Replace time coordinate with pressure values for interpolation
-        tds = tds.assign_coords(time=('time', tds['pressure'].values))
-        return self._handle_pressure_duplicates(tds)
-
-    def _handle_pressure_duplicates(self, tds):
+    def _stack_gridded_values(self):
         """
-        Handle duplicate pressure values by adding tiny offsets.
+        Stack every gridded variable into one contiguous (variable, time) array.
 
-        Steps:
-            - Identify duplicate time coordinate values (which are pressure values)
-            - Add small incremental offsets to make values unique
-            - Update time coordinate to match new pressure values
+        Returns:
+            tuple[np.ndarray, list, np.ndarray]: The pressure values, the `data_arrays` keys and the stacked values.
         """
-        time_coords = tds.time.values.copy()
-        unique_times, indices, counts = np.unique(time_coords, return_index=True, return_counts=True)
-        duplicates = unique_times[counts > 1]
-
-        if len(duplicates) > 0:
-            total_duplicates = sum(counts[counts > 1]) - len(duplicates)
-            self.logger.debug("Found %d duplicate pressure values affecting %d points",
-                            len(duplicates), total_duplicates)
-
-            for time_val in duplicates:
-                indices = np.where(time_coords == time_val)[0]
-                self.logger.debug("Resolving %d duplicates at pressure %.6f", len(indices), time_val)
-                for i, idx in enumerate(indices):
-                    time_coords[idx] = time_val + 0.000000000001 * i
-
-            # Update time coordinate with the modified values
-            tds = tds.assign_coords(time=('time', time_coords))
-        else:
-            self.logger.debug("No duplicate pressure values found")
-
-        return tds
+        pres = np.ascontiguousarray(self.pres, dtype=float)
+        keys = list(self.data_arrays.keys())
+        values = np.empty((len(keys), len(pres)))
+        for k, data_array_key in enumerate(keys):
+            values[k] = self.ds[data_array_key.replace('int_', '')].values
+        return pres, keys, values
 
     def _interpolate_variables(self):
         """
         Interpolate variables to fixed pressure grid.
 
         Steps:
-            - Select and process time slices
-            - Interpolate each variable onto the fixed pressure grid
+            - Stack the gridded variables into one contiguous array
+            - Split the time bins into contiguous chunks
+            - Grid the chunks in this process, or in a process pool when `n_workers` > 1
         """
         self.logger.info("Starting interpolation for %d time slices", self.xx)
 
-        empty_slices = 0
-        processed_slices = 0
+        pres, keys, values = self._stack_gridded_values()
+        starts = self.bin_starts[self.populated_rows]
+        stops = self.bin_stops[self.populated_rows]
+        n_rows = len(self.populated_rows)
 
-        for ttt in range(self.xx):
-            self.logger.debug("Processing time slice %d/%d: %s to %s",
-                            ttt + 1, self.xx, self.int_time[ttt], self.int_time[ttt+1])
+        # Contiguous chunks of rows, about ten per worker to keep the pool balanced.
+        n_chunks = max(1, min(n_rows, 10 * max(1, self.n_workers)))
+        bounds = np.linspace(0, n_rows, n_chunks + 1).astype(int)
+        chunks = [(first, last) for first, last in zip(bounds[:-1], bounds[1:]) if last > first]
 
-            tds = self.ds.sel(time=slice(str(self.int_time[ttt]), str(self.int_time[ttt+1]))).copy()
-
-            # Skip empty time slices
-            if len(tds.time) == 0:
-                self.logger.debug("Time slice %d is empty, filling with NaN", ttt + 1)
-                empty_slices += 1
-                # Fill with NaN values for this time slice
-                for data_array_key in self.data_arrays.keys():
-                    self.data_arrays[data_array_key][ttt,:] = np.nan
-                continue
+        if self.n_workers > 1 and len(chunks) > 1 and len(keys) > 0:
+            processed_slices = self._interpolate_chunks_parallel(pres, values, starts, stops, chunks)
+        else:
+            out = [self.data_arrays[data_array_key] for data_array_key in keys]
+            processed_slices = 0
+            for chunk_num, (first, last) in enumerate(chunks):
+                processed_slices += _grid_bins(pres, values, starts[first:last], stops[first:last],
+                                               self.int_pres, [array[first:last] for array in out])
+                self._log_interpolation_progress(chunk_num + 1, len(chunks))
 
-            tds = self._process_time_slice(tds)
-            processed_slices += 1
-
-            # Interpolate each variable
-            vars_interpolated = 0
-            for data_array_key, value in self.data_arrays.items():
-                tds_key = data_array_key.replace('int_', '')
-
-                # Check if the variable exists in the time slice
-                if tds_key in tds:
-                    try:
-                        self.data_arrays[data_array_key][ttt,:] = tds[tds_key].interp(time=self.int_pres)
-                        vars_interpolated += 1
-                    except Exception as e:
-                        self.logger.warning("Interpolation failed for %s in slice %d: %s",
-                                          tds_key, ttt + 1, str(e))
-                        self.data_arrays[data_array_key][ttt,:] = np.nan
-                else:
-                    self.logger.debug("Variable %s not found in slice %d, filling with NaN",
-                                    tds_key, ttt + 1)
-                    # Fill with NaN if variable doesn't exist
-                    self.data_arrays[data_array_key][ttt,:] = np.nan
+        self.logger.info("Interpolation complete: %d processed, %d empty slices",
+                        processed_slices, self.xx - processed_slices)
 
-            if ttt % max(1, self.xx // 10) == 0:  # Log progress every 10%
-                progress = 100 * (ttt + 1) / self.xx
-                self.logger.info("Interpolation progress: %.1f%% (%d/%d slices)",
-                               progress, ttt + 1, self.xx)
+    def _interpolate_chunks_parallel(self, pres, values, starts, stops, chunks):
+        """
+        Grid chunks of populated rows in a process pool.
 
-        self.logger.info("Interpolation complete: %d processed, %d empty slices",
-                        processed_slices, empty_slices)
+        The inputs and the output grid are placed in shared memory, so the workers never
+        receive a copy of the dataset. Each worker writes its rows of the output directly and
+        the output is copied into `data_arrays` once all chunks are done.
 
-    def _calculate_derived_quantities(self):
+        Returns:
+            int: The number of non-empty time bins.
         """
-        Calculate derived oceanographic quantities.
+        keys = list(self.data_arrays.keys())
+        self.logger.info("Gridding %d chunks with %d worker processes", len(chunks), self.n_workers)
 
-        Computed quantities:
-            - Absolute salinity, conservative temperature, and potential temperature
-            - Specific heat capacity, spiciness, and depth
-        Derived quantities:
-            - Heat content (HC): :math:`\\Delta Z \\cdot C_p \\cdot T \\cdot \\rho`
-            - Potential heat content (PHC): :math:`\\Delta Z \\cdot C_p \\cdot (T - 26) \\cdot \\rho`, where values < 0 are set to NaN
+        created = []
+        arrays = {}
+        try:
+            blocks = {}
+            for key, shape, source in [('pres', pres.shape, pres),
+                                       ('values', values.shape, values),
+                                       ('out', (len(keys), len(starts), self.yy), None)]:
+                shm = shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(shape)) * 8))
+                created.append(shm)
+                arrays[key] = np.ndarray(shape, dtype=float, buffer=shm.buf)
+                if source is None:
+                    arrays[key][:] = np.nan
+                else:
+                    arrays[key][:] = source
+                blocks[key] = (shm.name, shape)
+
+            processed_slices = 0
+            with ProcessPoolExecutor(max_workers=self.n_workers) as executor:
+                futures = [executor.submit(_grid_bins_shared, blocks, starts, stops,
+                                           self.int_pres, first, last)
+                           for first, last in chunks]
+                for chunk_num, future in enumerate(as_completed(futures)):
+                    processed_slices += future.result()
+                    self._log_interpolation_progress(chunk_num + 1, len(chunks))
+
+            for k, data_array_key in enumerate(keys):
+                self.data_arrays[data_array_key][:] = arrays['out'][k]
+        finally:
+            # The views must be released before the blocks can be closed.
+            arrays.clear()
+            for shm in created:
+                shm.close()
+                shm.unlink()
+
+        return processed_slices
+
+    def _log_interpolation_progress(self, chunks_done, n_chunks):
+        """Log the interpolation progress every 10%."""
+        if chunks_done % max(1, n_chunks // 10) == 0 or chunks_done == n_chunks:
+            self.logger.info("Interpolation progress: %.1f%% (%d/%d chunks)",
+                           100 * chunks_done / n_chunks, chunks_done, n_chunks)
+
+    def _bin_mean_variables(self):
         """
-        self.logger.info("Calculating derived oceanographic quantities")
+        Average the observations falling in each (time, pressure) cell of the grid.
 
-        # Check for required variables
-        required_vars = ['int_salinity', 'int_temperature', 'int_density']
-        missing_vars = [var for var in required_vars if var not in self.data_arrays]
+        Steps:
+            - Assign every observation to a time row and pressure column with integer division
+            - Reduce each variable with ``np.bincount`` to the count, mean and standard deviation per cell
 
-        if missing_vars:
-            self.logger.error("Missing required variables for derived calculations: %s", missing_vars)
-            raise ValueError(f"Cannot calculate derived quantities: missing {missing_vars}")
+        Time row ``i`` holds the observations from ``int_time[i]`` up to ``int_time[i+1]``, and pressure
+        column ``k`` holds the observations within half an interval of ``int_pres[k]``.
+        """
+        self.logger.info("Starting bin averaging onto %d x %d cells", self.xx, self.yy)
+
+        pres, keys, values = self._stack_gridded_values()
+
+        # Cell of every observation, the final time edge belongs to the last row.
+        time_step = np.timedelta64(int(self.interval_h), 'h').astype('timedelta64[ns]')
+        rows = (self.time - self.int_time[0]) // time_step
+        rows[self.time == self.int_time[-1]] = self.xx - 1
+        cols = np.floor(pres / self.interval_p + 0.5).astype(int)
+        in_grid = (rows >= 0) & (rows < self.xx) & (cols >= 0) & (cols < self.yy)
+
+        # Every time bin holding an observation is a populated row.
+        n_rows = len(self.populated_rows)
+        row_position = np.full(self.xx, -1)
+        row_position[self.populated_rows] = np.arange(n_rows)
+        cells = np.where(in_grid, row_position[np.clip(rows, 0, self.xx - 1)] * self.yy + cols, -1)
+
+        n_cells = n_rows * self.yy
+        for k, data_array_key in enumerate(keys):
+            valid = in_grid & np.isfinite(values[k])
+            var_cells = cells[valid]
+            var_values = values[k][valid]
+
+            counts = np.bincount(var_cells, minlength=n_cells)
+            sums = np.bincount(var_cells, weights=var_values, minlength=n_cells)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                means = sums / counts
+                squares = np.bincount(var_cells, weights=(var_values - means[var_cells]) ** 2, minlength=n_cells)
+                std = np.sqrt(squares / counts)
+
+            self.data_arrays[data_array_key][:] = means.reshape(n_rows, self.yy)
+            self.data_counts[data_array_key] = counts.reshape(n_rows, self.yy)
+            self.data_std[data_array_key] = std.reshape(n_rows, self.yy)
+
+        self.logger.info("Bin averaging complete: %d of %d cells populated",
+                        np.count_nonzero(next(iter(self.data_counts.values()), [])), self.xx * self.yy)
+
+    def _requested_derived_variables(self) -> list:
+        """
+        Look up the requested derived variables in the registry.
 
-        self.logger.debug("Computing absolute salinity from practical salinity")
-        sa = gsw.SA_from_SP(self.data_arrays['int_salinity'], self.grid_pres, self.lon, self.lat)
+        Returns:
+            list: The DerivedVariables to add to the gridded dataset.
 
-        self.logger.debug("Computing potential temperature")
-        pt = gsw.pt0_from_t(sa, self.data_arrays['int_temperature'], self.grid_pres)
+        Raises:
+            ValueError: If a requested name is not registered.
+        """
+        requested = DEFAULT_DERIVED_VARIABLES if self.derived_variables is None else self.derived_variables
+        derived_variables = []
+        for derived_variable in requested:
+            if isinstance(derived_variable, str):
+                if derived_variable not in DERIVED_VARIABLES:
+                    raise ValueError(f"Unknown derived variable: {derived_variable}. "
+                                     f"Must be one of {list(DERIVED_VARIABLES)}")
+                derived_variable = DERIVED_VARIABLES[derived_variable]
+            derived_variables.append(derived_variable)
+        return derived_variables
+
+    def _evaluate_derived(self, derived_variable, quantities: dict):
+        """
+        Evaluate a derived quantity, evaluating the registered quantities it depends on first.
 
-        self.logger.debug("Computing conservative temperature")
-        ct = gsw.CT_from_pt(sa, pt)
+        Evaluated quantities are stored in `quantities`, so intermediates such as absolute salinity
+        are shared between the derived variables.
 
-        self.logger.debug("Computing specific heat capacity")
-        cp = gsw.cp_t_exact(sa, self.data_arrays['int_temperature'], self.grid_pres) * 0.001
+        Args:
+            derived_variable (DerivedVariable): The quantity to evaluate.
+            quantities (dict): Available arrays by name, holding the populated rows, or one value per pressure level.
 
-        self.logger.debug("Computing depth from pressure")
-        dep = gsw.z_from_p(self.grid_pres, self.lat, geo_strf_dyn_height=0, sea_surface_geopotential=0)
+        Returns:
+            np.ndarray | None: The evaluated quantity, None if any of its inputs is missing.
+        """
+        if derived_variable.name in quantities:
+            return quantities[derived_variable.name]
+
+        inputs = []
+        for input_name in derived_variable.inputs:
+            if input_name not in quantities:
+                if input_name not in DERIVED_VARIABLES:
+                    self.logger.debug("Input %s of %s is not available", input_name, derived_variable.name)
+                    quantities[derived_variable.name] = None
+                    return None
+                self._evaluate_derived(DERIVED_VARIABLES[input_name], quantities)
+            if quantities[input_name] is None:
+                quantities[derived_variable.name] = None
+                return None
+            inputs.append(quantities[input_name])
+
+        self.logger.debug("Computing %s", derived_variable.name)
+        func = partial(derived_variable.func, **{param: getattr(self, param) for param in derived_variable.params})
+        if derived_variable.per_level:
+            values = func(*inputs)
+        else:
+            # The functions are only evaluated on the cells holding valid inputs.
+            values = _evaluate_valid(func, (len(self.populated_rows), self.yy), *inputs)
+        quantities[derived_variable.name] = values
+        return values
 
-        self.logger.debug("Computing spiciness")
-        spc = gsw.spiciness0(sa, ct)
+    def _calculate_derived_quantities(self) -> dict:
+        """
+        Calculate the requested derived variables (see `derived_variables`).
 
-        self.logger.debug("Computing heat content and potential heat content")
-        dz = self.interval_p
-        hc = dz * cp * self.data_arrays['int_temperature'] * self.data_arrays['int_density']
-        phc = dz * cp * (self.data_arrays['int_temperature'] - 26) * self.data_arrays['int_density']
+        Default derived variables:
+            - Heat content (HC): :math:`\\Delta Z \\cdot C_p \\cdot T \\cdot \\rho`
+            - Potential heat content (PHC): :math:`\\Delta Z \\cdot C_p \\cdot (T - 26) \\cdot \\rho`, where values < 0 are set to NaN
+            - Spiciness and depth
 
-        # Count negative PHC values before setting to NaN
-        negative_phc_count = np.sum(phc < 0)
-        total_phc_count = np.size(phc)
-        phc[phc < 0] = np.nan
+        Derived variables whose inputs are not gridded are skipped.
 
-        self.logger.debug("Set %d negative PHC values to NaN (%.1f%% of total)",
-                        negative_phc_count, 100 * negative_phc_count / total_phc_count)
+        Returns:
+            dict: Derived variables by name, holding the populated rows, or one value per pressure level.
+        """
+        self.logger.info("Calculating derived oceanographic quantities")
 
-        # Log value ranges for key quantities
-        self.logger.debug("Heat content range: %.2e to %.2e J/m³", np.nanmin(hc), np.nanmax(hc))
-        self.logger.debug("Potential heat content range: %.2e to %.2e J/m³", np.nanmin(phc), np.nanmax(phc))
-        self.logger.debug("Spiciness range: %.3f to %.3f", np.nanmin(spc), np.nanmax(spc))
-        self.logger.debug("Depth range: %.1f to %.1f m", np.nanmin(dep), np.nanmax(dep))
+        quantities = {'pres': self.int_pres, **self.data_arrays}
+        derived = {}
+        for derived_variable in self._requested_derived_variables():
+            values = self._evaluate_derived(derived_variable, quantities)
+            if values is None:
+                self.logger.warning("Skipping derived variable %s: missing inputs", derived_variable.name)
+                continue
+            derived[derived_variable.name] = values
+            if np.any(np.isfinite(values)):
+                self.logger.debug("%s range: %.3g to %.3g", derived_variable.name, np.nanmin(values), np.nanmax(values))
 
-        return hc, phc, spc, dep
+        self.logger.info("Calculated %d derived variables", len(derived))
+        return derived
 
-    def _create_output_dataset(self, hc, phc, spc, dep):
+    def _create_output_dataset(self, derived):
         """
         Create the final xarray Dataset with all variables.
 
+        The gridded and derived variables only hold the populated rows until here, where they are
+        expanded to the full grid.
+
         Output variables:
             - Gridded variables with `'g_'` prefix
-            - g_hc: Heat content in kJ cm^{-2}
-            - g_phc: Potential heat content in kJ cm^{-2}
-            - g_sp: Spiciness
-            - g_depth: Depth in meters
+            - Derived variables, such as g_hc, g_phc, g_sp and g_depth
+
+        The rows are indexed by ``g_time``, or by ``profile`` with per-profile time, latitude,
+        longitude and direction coordinates when gridding by profile.
         """
         self.logger.info("Creating output gridded dataset")
 
@@ -395,43 +881,146 @@ class Gridder:
             base_key = data_array_key.replace('int_', '')
             if base_key in self.variable_names:
                 gridded_var = f'g_{base_key}'
-                self.ds_gridded[gridded_var] = xr.DataArray(
-                    value,
-                    [('g_time', self.int_time[1:]), ('g_pres', self.int_pres)]
-                )
+                self.ds_gridded[gridded_var] = xr.DataArray(self.dense_array(value), self._grid_coords())
                 interpolated_vars += 1
                 self.logger.debug("Added gridded variable: %s", gridded_var)
 
         self.logger.info("Added %d interpolated variables to dataset", interpolated_vars)
 
-        # Add derived variables
-        derived_vars = {
-            'g_hc': hc * 10**-4,
-            'g_phc': phc * 10**-4,
-            'g_sp': spc,
-            'g_depth': dep
-        }
-
-        for var_name, data in derived_vars.items():
-            self.ds_gridded[var_name] = xr.DataArray(
-                data,
-                [('g_time', self.int_time[1:]), ('g_pres', self.int_pres)]
-            )
+        # Add derived variables, the ones computed per pressure level are repeated for every row
+        for var_name, values in derived.items():
+            if values.ndim == 1:
+                data = np.tile(values, (self.xx, 1))
+            else:
+                data = self.dense_array(values)
+            self.ds_gridded[var_name] = xr.DataArray(data, self._grid_coords())
             self.logger.debug("Added derived variable: %s", var_name)
 
-        self.logger.info("Added %d derived variables to dataset", len(derived_vars))
+        self.logger.info("Added %d derived variables to dataset", len(derived))
+
+        # Time, position and direction of every profile
+        if self.method == 'profile':
+            self.ds_gridded = self.ds_gridded.assign_coords(
+                profile_time=('profile', self.profile_time),
+                profile_lat=('profile', self.profile_lat),
+                profile_lon=('profile', self.profile_lon),
+                profile_direction=('profile', self.profile_direction),
+            )
 
         total_vars = len(self.ds_gridded.data_vars)
-        grid_size = len(self.int_time[1:]) * len(self.int_pres)
         self.logger.debug("Final gridded dataset: %d variables on %dx%d grid (%d total points)",
-                        total_vars, len(self.int_time[1:]), len(self.int_pres), grid_size)
+                        total_vars, self.xx, self.yy, self.xx * self.yy)
+
+    def _coarsen_grid(self, interval_h, interval_p):
+        """
+        Create the Gridder of a coarser grid, averaged from the gridded variables of this Gridder.
+
+        The coarse Gridder is built by the constructor from the settings of this Gridder, see
+        `_average_finer_grid`, and shares its dataset and sorted time axis, so nothing is gridded again.
+
+        Args:
+            interval_h (int | float): Time interval (in hours), a multiple of `interval_h`.
+            interval_p (int | float): Pressure interval (in decibars), a multiple of `interval_p`.
+
+        Returns:
+            Gridder: A Gridder holding the coarse grid, ready for the derived quantities.
+        """
+        self.logger.info("Coarsening grid to %sh time, %s dbar pressure", interval_h, interval_p)
+        return evolve(self, interval_h=interval_h, interval_p=interval_p, resolutions=None, finer_grid=self)
+
+    def _average_finer_grid(self):
+        """
+        Average the gridded variables of `_finer_grid` onto the grid of this Gridder.
+
+        Coarse time row ``j`` holds the fine rows ending after ``int_time[j]`` up to ``int_time[j+1]``,
+        and coarse pressure column ``k`` the fine levels within half an interval of ``int_pres[k]``.
+        When gridding by profile the rows are kept and only the pressure is coarsened.
+        Bin averaged cells are weighted by their observation counts.
+        """
+        fine = self._finer_grid
+        self.ds, self.variable_names, self.time, self.pres = fine.ds, fine.variable_names, fine.time, fine.pres
+        self.lat, self.lon = fine.lat, fine.lon
+
+        # Coarse pressure column of every fine pressure level
+        end_pres = np.nanmax(fine.pres) if self.max_pressure is None else self.max_pressure
+        self.int_pres = np.arange(0, end_pres, self.interval_p)
+        self.yy = len(self.int_pres)
+        cols = np.floor(np.arange(fine.yy) / round(self.interval_p / fine.interval_p) + 0.5).astype(int)
+        cols[cols >= self.yy] = -1
+
+        # Coarse row of every fine row, the profiles are kept as rows
+        if self.method == 'profile':
+            self.xx, self.int_time, self.bin_starts, self.bin_stops = fine.xx, fine.int_time, fine.bin_starts, fine.bin_stops
+            self.profile_time, self.profile_lat, self.profile_lon, self.profile_direction = (
+                fine.profile_time, fine.profile_lat, fine.profile_lon, fine.profile_direction)
+            rows = np.arange(fine.xx)
+            row_time = self.profile_time
+        else:
+            self.int_time = self._time_edges(self.interval_h)
+            self.bin_starts, self.bin_stops = _bin_offsets(fine.time, self.int_time)
+            self.xx = len(self.int_time) - 1
+            rows = np.searchsorted(self.int_time, fine.int_time[1:], side='left') - 1
+            rows[(rows < 0) | (rows >= self.xx)] = -1
+            row_time = self.int_time[1:]
+
+        self.grid_pres = np.broadcast_to(self.int_pres, (self.xx, self.yy))
+        self.grid_time = np.broadcast_to(row_time[:, np.newaxis], (self.xx, self.yy))
+
+        # Only coarse rows holding populated fine rows are stored.
+        rows = rows[fine.populated_rows]
+        self.populated_rows = np.unique(rows[rows >= 0])
+        compact_rows = np.where(rows >= 0, np.searchsorted(self.populated_rows, rows), -1)
+        shape = (len(self.populated_rows), self.yy)
+
+        self.data_arrays, self.data_counts, self.data_std = {}, {}, {}
+        for data_array_key, values in fine.data_arrays.items():
+            if data_array_key in fine.data_counts:
+                counts = fine.data_counts[data_array_key]
+                means, totals = _coarsen(values, compact_rows, cols, shape, weights=counts)
+                squares, _ = _coarsen(fine.data_std[data_array_key] ** 2 + values ** 2,
+                                      compact_rows, cols, shape, weights=counts)
+                self.data_counts[data_array_key] = totals.astype(int)
+                self.data_std[data_array_key] = np.sqrt(np.clip(squares - means ** 2, 0, None))
+            else:
+                means, _ = _coarsen(values, compact_rows, cols, shape)
+            self.data_arrays[data_array_key] = means.astype(values.dtype, copy=False)
+
+        self.logger.debug("Coarse grid: %d %s x %d pressure", self.xx, self._row_dim, self.yy)
+        # The fine grid is no longer needed once averaged.
+        self._finer_grid = None
+
+    def _grid_variables(self):
+        """Interpolate or bin average (see `method`) the variables onto the grid."""
+        if self.method == 'bin_mean':
+            self.logger.info("Step 1/4: Bin averaging variables to grid")
+            self._bin_mean_variables()
+        else:
+            self.logger.info("Step 1/4: Interpolating variables to grid")
+            self._interpolate_variables()
+
+    def _finish_gridded_dataset(self) -> xr.Dataset:
+        """Compute the derived quantities and create the gridded dataset with its attributes."""
+        self.logger.info("Step 2/4: Computing derived oceanographic quantities")
+        derived = self._calculate_derived_quantities()
+
+        self.logger.info("Step 3/4: Creating output dataset")
+        self._create_output_dataset(derived)
+
+        self.logger.info("Step 4/4: Adding metadata attributes")
+        self.add_attrs()
+
+        # Log final dataset summary
+        nan_percentage = 100 * np.isnan(list(self.ds_gridded.data_vars.values())[0].values).sum() / self.xx / self.yy
+        self.logger.debug("Dataset completeness: %.1f%% valid data points", 100 - nan_percentage)
+
+        return self.ds_gridded
 
     def create_gridded_dataset(self) -> xr.Dataset:
         """
         Process and interpolate time-sliced data to create a gridded dataset.
 
         This method orchestrates the complete gridding process by:
-            1. Interpolating variables onto a fixed pressure grid
+            1. Interpolating or bin averaging (see `method`) variables onto a fixed pressure grid
             2. Computing derived oceanographic quantities
             3. Creating the final dataset with standardized dimensions
             4. Adding metadata attributes
@@ -444,28 +1033,138 @@ class Gridder:
         start_time = pd.Timestamp.now()
 
         try:
-            self.logger.info("Step 1/4: Interpolating variables to grid")
-            self._interpolate_variables()
+            self._grid_variables()
+            self._finish_gridded_dataset()
 
-            self.logger.info("Step 2/4: Computing derived oceanographic quantities")
-            hc, phc, spc, dep = self._calculate_derived_quantities()
+            processing_time = pd.Timestamp.now() - start_time
+            self.logger.info("=== Gridded dataset creation complete in %.2f seconds ===",
+                           processing_time.total_seconds())
 
-            self.logger.info("Step 3/4: Creating output dataset")
-            self._create_output_dataset(hc, phc, spc, dep)
+            return self.ds_gridded
 
-            self.logger.info("Step 4/4: Adding metadata attributes")
-            self.add_attrs()
+        except Exception as e:
+            self.logger.error("Gridded dataset creation failed: %s", str(e))
+            raise
+
+    def create_gridded_datasets(self) -> dict:
+        """
+        Create a gridded dataset for every resolution in `resolutions`.
+
+        The variables are gridded once at the finest resolution and the coarser resolutions are
+        averaged from the finest grid. The derived quantities and attributes are computed for
+        every resolution.
+
+        Returns:
+            dict: Gridded datasets keyed by their ``(interval_h, interval_p)`` resolution.
+        """
+        resolutions = self.resolutions if self.resolutions is not None else [(self.interval_h, self.interval_p)]
+        self.logger.info("=== Starting gridded dataset creation for %d resolutions ===", len(resolutions))
+        start_time = pd.Timestamp.now()
+
+        try:
+            self._grid_variables()
+
+            datasets = {}
+            for interval_h, interval_p in resolutions:
+                if (interval_h, interval_p) == (self.interval_h, self.interval_p):
+                    level = self
+                else:
+                    level = self._coarsen_grid(interval_h, interval_p)
+                datasets[(interval_h, interval_p)] = level._finish_gridded_dataset()
 
             processing_time = pd.Timestamp.now() - start_time
             self.logger.info("=== Gridded dataset creation complete in %.2f seconds ===",
                            processing_time.total_seconds())
 
-            # Log final dataset summary
-            nan_percentage = 100 * np.isnan(list(self.ds_gridded.data_vars.values())[0].values).sum() / self.ds_gridded.sizes['g_time'] / self.ds_gridded.sizes['g_pres']
-            self.logger.debug("Dataset completeness: %.1f%% valid data points", 100 - nan_percentage)
-
-            return self.ds_gridded
+            return datasets
 
         except Exception as e:
             self.logger.error("Gridded dataset creation failed: %s", str(e))
             raise
+
+
+def stream_gridded_netcdf(ds_mission: xr.Dataset, path, window_days: int | float = 30, **gridder_kwargs) -> Path:
+    '''
+    Grid a mission in time windows, appending the gridded rows of every window to a NetCDF file.
+
+    Only one window of the mission is copied and gridded at a time, so the memory used is bounded by
+    the window length instead of the mission length. All windows share the pressure grid, the time
+    grid and the mean position of the full mission, so the rows match those of gridding the whole
+    mission at once. Windows without enough observations are left out of the file.
+
+    Args:
+        ds_mission (xr.Dataset): The mission dataset to grid.
+        path (str | Path): Output NetCDF file, overwritten if it exists.
+        window_days (int | float): Length of the time windows in days, a multiple of the time interval.
+        **gridder_kwargs: Keyword arguments passed to every window's `Gridder`, such as `interval_h`,
+            `interval_p`, `method` or `derived_variables`.
+
+    Returns:
+        Path: The path of the written file.
+
+    Raises:
+        ValueError: If the settings cannot be gridded in windows or no window contains enough data.
+    '''
+    logger = logging.getLogger('glider_ingest')
+    path = Path(path)
+    interval_h = gridder_kwargs.get('interval_h', fields(Gridder).interval_h.default)
+
+    if gridder_kwargs.get('method') == 'profile' or gridder_kwargs.get('resolutions') is not None:
+        raise ValueError("Windowed gridding supports a single resolution with the 'interp' or 'bin_mean' method")
+    window_hours = window_days * 24
+    if window_hours <= 0 or not np.isclose(round(window_hours / interval_h) * interval_h, window_hours):
+        raise ValueError(f'Window of {window_days} days is not a multiple of the {interval_h} hour time interval')
+
+    # Grid settings of the full mission
+    time = ds_mission.time.values
+    pressure = ds_mission['pressure'].values
+    valid_times = time[~np.isnan(pressure)]
+    if len(valid_times) <= 1:
+        raise ValueError(f'Not enough values to grid {valid_times}')
+    start_time, end_time = _round_time_bounds(valid_times.min(), valid_times.max(), interval_h)
+    max_pressure = np.nanmax(pressure)
+    lon = np.nanmean(ds_mission.longitude.values)
+    lat = np.nanmean(ds_mission.latitude.values)
+    del valid_times
+
+    # Windows are located with searchsorted, which requires a sorted time axis.
+    order = None
+    if not np.all(np.diff(time) >= np.timedelta64(0)):
+        order = np.argsort(time, kind='stable')
+        time = time[order]
+
+    window_edges = list(pd.date_range(start_time, end_time, freq=pd.Timedelta(hours=window_hours)))
+    if window_edges[-1] < end_time:
+        window_edges.append(end_time)
+    logger.info("Gridding %s to %s in %d windows of %s days", start_time, end_time,
+                len(window_edges) - 1, window_days)
+
+    # Interpolated rows use the samples on both edges of their bin, but a bin average counts a sample on
+    # an edge in the bin it opens, so only the last window holds the samples on its closing edge.
+    closing_side = 'left' if gridder_kwargs.get('method') == 'bin_mean' else 'right'
+
+    n_rows = 0
+    for window_first, window_last in zip(window_edges[:-1], window_edges[1:]):
+        first = np.searchsorted(time, window_first.to_datetime64(), side='left')
+        side = 'right' if window_last == window_edges[-1] else closing_side
+        last = np.searchsorted(time, window_last.to_datetime64(), side=side)
+        index = slice(first, last) if order is None else np.sort(order[first:last])
+        ds_window = ds_mission.isel(time=index)
+        if np.count_nonzero(~np.isnan(ds_window['pressure'].values)) <= 1:
+            logger.info("Skipping window %s to %s: not enough values to grid", window_first, window_last)
+            continue
+
+        gridder = Gridder(ds_window, max_pressure=max_pressure, time_bounds=(window_first, window_last),
+                          position=(lat, lon), **gridder_kwargs)
+        ds_gridded = gridder.create_gridded_dataset()
+
+        if n_rows == 0:
+            ds_gridded.to_netcdf(path, unlimited_dims=['g_time'], encoding={'g_time': TIME_ENCODING})
+        else:
+            write_netcdf_rows(path, ds_gridded, 'g_time', n_rows)
+        n_rows += ds_gridded.sizes['g_time']
+        logger.info("Wrote window %s to %s, %d rows in total", window_first, window_last, n_rows)
+
+    if n_rows == 0:
+        raise ValueError(f'No window of {window_days} days contains enough values to grid')
+    return path
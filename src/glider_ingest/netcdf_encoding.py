@@ -0,0 +1,143 @@
+'''
+Module containing the NetCDF encoding profiles: compression, chunking and packing of the saved variables.
+'''
+import numpy as np
+import xarray as xr
+import netCDF4
+import logging
+
+from .variable import Variable
+
+# Compression codec and level, byte shuffle, target chunk size and CF packing of every profile
+ENCODING_PROFILES = {
+    'archive': {'compression': 'zlib', 'complevel': 9, 'shuffle': True, 'chunk_mb': 16, 'pack': False},
+    'fast': {'compression': 'zstd', 'complevel': 1, 'shuffle': True, 'chunk_mb': 4, 'pack': False},
+    'erddap': {'compression': 'zlib', 'complevel': 4, 'shuffle': True, 'chunk_mb': 1, 'pack': True},
+}
+
+# Packed dtypes from the smallest, with their fill value, which is not used for data
+PACKED_DTYPES = [('int16', np.iinfo(np.int16).min), ('int32', np.iinfo(np.int32).min)]
+
+
+def _precision_scale(precision) -> float|None:
+    '''
+    Step of the values of a variable from its precision, a number of decimals (5) or a step (0.01).
+    '''
+    try:
+        precision = float(precision)
+    except (TypeError, ValueError):
+        return None
+    if precision >= 1 and precision.is_integer():
+        return 10 ** -precision
+    if 0 < precision < 1:
+        return precision
+    return None
+
+
+def packing_encoding(variable: Variable) -> dict|None:
+    '''
+    CF packing of a variable into integers, from its valid range and precision.
+
+    The values are stored as ``(value - add_offset) / scale_factor`` in the smallest integer dtype that
+    holds the valid range in steps of the precision. Without a precision the range is spread over int16.
+
+    Args:
+        variable (Variable): The variable to pack.
+
+    Returns:
+        dict | None: The ``dtype``, ``scale_factor``, ``add_offset`` and ``_FillValue`` encoding,
+        None if the variable has no valid range or the range does not fit int32.
+    '''
+    try:
+        valid_min, valid_max = float(variable.valid_min), float(variable.valid_max)
+    except (TypeError, ValueError):
+        return None
+    if not valid_max > valid_min:
+        return None
+
+    scale_factor = _precision_scale(variable.precision)
+    for dtype, fill_value in PACKED_DTYPES:
+        # Codes are symmetric around the offset, leaving the most negative integer to the fill value
+        n_steps = 2 * (np.iinfo(dtype).max - 1)
+        if scale_factor is None:
+            scale_factor = (valid_max - valid_min) / n_steps
+        if (valid_max - valid_min) / scale_factor <= n_steps:
+            return {'dtype': dtype, 'scale_factor': scale_factor, 'add_offset': (valid_max + valid_min) / 2,
+                    '_FillValue': fill_value}
+    return None
+
+
+def _chunksizes(variable: xr.Variable, chunk_bytes: int, unlimited_dims) -> tuple|None:
+    '''
+    Chunk shape of a variable: whole rows of the trailing dimensions, as many rows as fit `chunk_bytes`.
+
+    Chunks of fixed dimensions are no longer than the dimension, chunks of unlimited dimensions may be.
+    '''
+    if variable.ndim == 0 or 0 in variable.shape:
+        return None
+    row_bytes = variable.dtype.itemsize * int(np.prod(variable.shape[1:]))
+    rows = max(1, chunk_bytes // row_bytes)
+    if variable.dims[0] not in unlimited_dims:
+        rows = min(rows, variable.shape[0])
+    return (rows,) + variable.shape[1:]
+
+
+def get_encoding(ds: xr.Dataset, profile: str, variables: list|None = None, unlimited_dims=()) -> dict:
+    '''
+    NetCDF encoding of a dataset for an encoding profile.
+
+    Every numeric variable is compressed and chunked along its first dimension, so ``time`` variables
+    are chunked in time and gridded variables in whole ``g_pres`` profiles of ``g_time``. With packing,
+    the variables of `variables` and their gridded ``g_`` versions are packed into integers, see
+    `packing_encoding`, unless their data does not fit the packed range.
+
+    Args:
+        ds (xr.Dataset): The dataset to save.
+        profile (str): Name of the profile in `ENCODING_PROFILES`.
+        variables (list | None): The `Variable` of the dataset variables, used for packing.
+        unlimited_dims (iterable): Dimensions saved as unlimited.
+
+    Returns:
+        dict: The encoding of every variable, to pass to ``to_netcdf``.
+
+    Raises:
+        ValueError: If the profile is not supported.
+    '''
+    if profile not in ENCODING_PROFILES:
+        raise ValueError(f"Invalid encoding profile: {profile}. Must be one of {list(ENCODING_PROFILES)}")
+    logger = logging.getLogger('glider_ingest')
+    settings = ENCODING_PROFILES[profile]
+
+    compression = settings['compression']
+    if compression == 'zstd' and not netCDF4.__has_zstandard_support__:
+        logger.warning("The NetCDF library has no zstd support, compressing with zlib instead")
+        compression = 'zlib'
+
+    packings = {}
+    if settings['pack']:
+        for variable in variables or []:
+            packing = packing_encoding(variable)
+            if packing is not None:
+                packings[variable.short_name] = packing
+                packings[f'g_{variable.short_name}'] = packing
+
+    encoding = {}
+    for name, variable in ds.variables.items():
+        if not (np.issubdtype(variable.dtype, np.number) or np.issubdtype(variable.dtype, np.datetime64)):
+            continue
+        var_encoding = {'compression': compression, 'complevel': settings['complevel'],
+                        'shuffle': settings['shuffle']}
+        chunksizes = _chunksizes(variable, int(settings['chunk_mb'] * 1024 * 1024), unlimited_dims)
+        if chunksizes is not None:
+            var_encoding['chunksizes'] = chunksizes
+
+        packing = packings.get(name)
+        if packing is not None and np.issubdtype(variable.dtype, np.floating):
+            half_range = packing['scale_factor'] * (np.iinfo(packing['dtype']).max - 1)
+            if np.nanmin(variable.values, initial=np.inf) >= packing['add_offset'] - half_range and \
+                    np.nanmax(variable.values, initial=-np.inf) <= packing['add_offset'] + half_range:
+                var_encoding |= packing
+            else:
+                logger.debug("Not packing %s, its data is outside the packed range", name)
+        encoding[name] = var_encoding
+    return encoding
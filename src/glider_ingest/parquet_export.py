@@ -0,0 +1,85 @@
+'''
+Module to export the mission time series table to a Parquet dataset partitioned by day.
+'''
+from importlib.util import find_spec
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import json
+import logging
+
+# Schema metadata key of the global attributes
+GLOBAL_ATTRS_KEY = 'glider_ingest'
+
+
+def _check_pyarrow():
+    '''
+    Raise an ImportError if pyarrow, needed to write Parquet files, is not installed.
+    '''
+    if find_spec('pyarrow') is None:
+        raise ImportError("Writing Parquet files requires pyarrow, install the parquet extra with "
+                          "`pip install glider-ingest[parquet]`")
+
+
+def _metadata_value(value) -> str:
+    '''
+    Text of an attribute value in the Parquet metadata, numpy scalars and arrays as their Python values.
+    '''
+    if isinstance(value, (np.generic, np.ndarray)):
+        value = value.tolist()
+    return value if isinstance(value, str) else json.dumps(value, default=str)
+
+
+def write_parquet(df: pd.DataFrame, path: Path, column_attrs: dict|None = None, global_attrs: dict|None = None,
+                  row_group_rows: int = 16384, compression: str = 'zstd') -> int:
+    '''
+    Write a time indexed table to a Parquet dataset, one ``date=YYYY-MM-DD`` directory per day.
+
+    The rows are sorted by time and written in row groups of `row_group_rows` rows with column
+    statistics, so scans filtering on time or on values skip whole days and row groups. The time
+    index is stored as the ``time`` column. Days in the table replace the same days in the dataset,
+    the other days are kept.
+
+    Args:
+        df (pd.DataFrame): The table, indexed by time.
+        path (Path): The dataset directory.
+        column_attrs (dict | None): Attributes of the columns, keyed by column name, stored as field metadata.
+        global_attrs (dict | None): Global attributes, stored as JSON under `GLOBAL_ATTRS_KEY` in the schema metadata.
+        row_group_rows (int): Number of rows of every row group.
+        compression (str): Parquet compression codec.
+
+    Returns:
+        int: The number of written days.
+    '''
+    _check_pyarrow()
+    import pyarrow as pa
+    import pyarrow.dataset as pds
+    logger = logging.getLogger('glider_ingest')
+
+    if not df.index.is_monotonic_increasing:
+        df = df.sort_index(kind='stable')
+    table = pa.Table.from_pandas(df)
+    dates = df.index.normalize()
+    table = table.append_column('date', pa.array(dates.date, type=pa.date32()))
+
+    # Attributes of the columns, as text
+    fields = []
+    for table_field in table.schema:
+        attrs = (column_attrs or {}).get(table_field.name)
+        if attrs:
+            table_field = table_field.with_metadata({key: _metadata_value(value) for key, value in attrs.items()})
+        fields.append(table_field)
+    metadata = dict(table.schema.metadata or {})
+    if global_attrs:
+        metadata[GLOBAL_ATTRS_KEY] = json.dumps({key: _metadata_value(value) for key, value in global_attrs.items()})
+    table = table.cast(pa.schema(fields, metadata=metadata))
+
+    n_days = dates.nunique()
+    file_options = pds.ParquetFileFormat().make_write_options(compression=compression, write_statistics=True)
+    pds.write_dataset(table, Path(path), format='parquet', file_options=file_options,
+                      partitioning=pds.partitioning(pa.schema([('date', pa.date32())]), flavor='hive'),
+                      basename_template='part-{i}.parquet', existing_data_behavior='delete_matching',
+                      max_rows_per_group=row_group_rows, min_rows_per_group=row_group_rows,
+                      max_partitions=max(1024, n_days))
+    logger.debug("Wrote %d rows of %d days to %s", len(df), n_days, path)
+    return n_days
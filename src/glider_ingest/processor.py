@@ -1,18 +1,26 @@
+import numpy as np
 import pandas as pd
 import xarray as xr
 from pathlib import Path
-from attrs import define, field
+from attrs import define, field, fields
 import datetime
 import dbdreader
+import netCDF4
 import shutil
 import gsw
-import random
-import os
 import logging
 
-from .utils import find_nth, setup_logging
+from .utils import find_nth, setup_logging, write_netcdf_rows, TIME_ENCODING
 from .variable import Variable
-from .gridder import Gridder
+from .gridder import Gridder, _round_time_bounds
+from .copy_manifest import CopyManifest, MANIFEST_FILENAME, file_signature, sync_files
+from .file_index import FileIndex
+from .dbd_header import HeaderCache
+from .dbd_decode import get_sync
+from .segment_cache import SegmentCache
+from .netcdf_encoding import ENCODING_PROFILES, get_encoding
+from .zarr_store import ZARR_GROUPS, append_zarr, has_zarr_group, split_zarr_groups, write_zarr
+from .parquet_export import write_parquet
 from .dataset_attrs import get_default_variables, get_global_attrs
 
 
@@ -33,8 +41,20 @@ class Processor:
     # Optional attributes
     mission_start_date: datetime.datetime = field(default=pd.to_datetime('2010-01-01'))  # Used to slice the data during processing
     mission_end_date: datetime.datetime = field(default=pd.to_datetime(datetime.datetime.today()+datetime.timedelta(days=365)))  # Used to slice the data during processing
-    recopy_files: bool = field(default=False)  # If True, always recopy files even if they already exist
+    recopy_files: bool = field(default=False)  # If True, compare against the copied files instead of the copy manifest
+    copy_workers: int = field(default=8)  # Number of threads copying files
+    hash_files: bool = field(default=False)  # If True, hash files whose modification time changed to detect real changes
+    index_snapshot: bool = field(default=False)  # If True, keep a snapshot of the memory card file index in the mission folder
+    copy_mode: str = field(default='copy')  # How LOGS and STATE/CACHE files are placed in the mission folder, 'copy', 'hardlink', 'symlink' or 'none'
     include_gridded_data: bool = field(default=True)  # If True, include gridded data in the output dataset
+    n_workers: int = field(default=1)  # Number of worker processes used for gridding
+    decode_workers: int = field(default=1)  # Number of worker processes decoding DBD files, one file per task if more than 1
+    segment_cache: bool = field(default=False)  # If True, cache the decoded columns of every DBD file in the mission folder
+    segment_cache_mb: int|float|None = field(default=1024)  # Size cap of the segment cache in MB, None for no cap
+    gridding_method: str = field(default='interp')  # Gridding method, 'interp', 'bin_mean' or 'profile'
+    derived_variables: list|None = field(default=None)  # Derived gridded variables, None for the defaults
+    incremental: bool = field(default=False)  # If True, save() only decodes and appends the DBD files not yet in the output file
+    encoding_profile: str|None = field(default=None)  # NetCDF encoding profile of save(), 'archive', 'fast' or 'erddap', None for uncompressed
     _log_level: str = field(default='INFO')  # Logging level for the application
 
     # Created attributes
@@ -59,6 +79,9 @@ class Processor:
     _eng_df: pd.DataFrame|None = field(default=None)
     _sci_ds: xr.Dataset|None = field(default=None)
     _eng_ds: xr.Dataset|None = field(default=None)
+    _file_indexes: dict = field(factory=dict)
+    _header_cache: HeaderCache|None = field(default=None)
+    _dbd_filenames: list|None = field(default=None)
 
 
     @property
@@ -161,21 +184,27 @@ class Processor:
 
     @property
     def sci_df(self) -> pd.DataFrame:
-        return self.df[self.sci_vars]
+        if self._sci_df is None:
+            self._sci_df = self.df[self.sci_vars]
+        return self._sci_df
 
     @property
     def eng_df(self) -> pd.DataFrame:
-        eng_df = self.df[self.eng_vars].copy()
-        eng_df.index.name = 'm_time'
-        return eng_df
+        if self._eng_df is None:
+            self._eng_df = self.df[self.eng_vars].rename_axis('m_time')
+        return self._eng_df
 
     @property
     def sci_ds(self) -> xr.Dataset:
-        return xr.Dataset.from_dataframe(self.sci_df)
+        if self._sci_ds is None:
+            self._split_ds(self._dataset_from_dataframe(self.df))
+        return self._sci_ds
 
     @property
     def eng_ds(self) -> xr.Dataset:
-        return xr.Dataset.from_dataframe(self.eng_df)
+        if self._eng_ds is None:
+            self._split_ds(self._dataset_from_dataframe(self.df))
+        return self._eng_ds
 
     @property
     def log_level(self) -> str:
@@ -202,6 +231,12 @@ class Processor:
         self.logger.debug("Memory card path: %s", self.memory_card_copy_path)
         self.logger.debug("Working directory: %s", self.working_dir)
 
+        valid_copy_modes = ['copy', 'hardlink', 'symlink', 'none']
+        if self.copy_mode not in valid_copy_modes:
+            raise ValueError(f"Invalid copy mode: {self.copy_mode}. Must be one of {valid_copy_modes}")
+        if self.encoding_profile is not None and self.encoding_profile not in ENCODING_PROFILES:
+            raise ValueError(f"Invalid encoding profile: {self.encoding_profile}. Must be one of {list(ENCODING_PROFILES)}")
+
         self.add_mission_vars(get_default_variables())
         self.logger.debug("Added %d default variables", len(get_default_variables()))
 
@@ -270,9 +305,52 @@ class Processor:
         removed_count = initial_count - len(self.mission_vars)
         self.logger.info("Successfully removed %d variables. Remaining: %d", removed_count, len(self.mission_vars))
 
+    def _get_file_index(self, directory_path: Path) -> FileIndex:
+        """
+        Get the file index covering a directory, creating it on first use.
+
+        Directories below the memory card copy or the mission folder share the index of that folder,
+        the memory card index is snapshotted in the mission folder with index_snapshot.
+        """
+        directory_path = Path(directory_path)
+        for root in [self.memory_card_copy_path, self.mission_folder_path]:
+            if directory_path == root or root in directory_path.parents:
+                break
+        else:
+            root = directory_path
+
+        if root not in self._file_indexes:
+            snapshot_path = None
+            if self.index_snapshot and root == self.memory_card_copy_path:
+                snapshot_path = self.mission_folder_path / '.memory_card_index.json'
+            self._file_indexes[root] = FileIndex(root, snapshot_path=snapshot_path)
+        return self._file_indexes[root]
+
+    def invalidate_file_index(self, directory_path: Path|None = None):
+        """
+        Drop the cached file index of a folder, or of all folders, so it is listed again on the next lookup.
+
+        Args:
+            directory_path (Path | None): Root of the index to drop, all indexes if None.
+        """
+        for root, index in self._file_indexes.items():
+            if directory_path is None or Path(directory_path) == root:
+                index.invalidate()
+
+    def _get_source_directories(self) -> list[Path]:
+        """
+        Get the LOGS and STATE/CACHE folders of the memory card copy
+        """
+        include_patterns = ['LOGS', 'logs', 'STATE/CACHE', 'state/cache']
+        return self._get_file_index(self.memory_card_copy_path).find_directories(include_patterns)
+
     def _copy_files(self):
         """
         Copy only LOGS and STATE/CACHE folders from memory card copy to working directory
+
+        Only new or changed files are copied (or linked, see copy_mode), in a thread pool. The copied
+        files are recorded in a manifest in the mission folder, with recopy_files the destination files
+        are compared instead.
         """
         self.logger.info("Starting file copy operation")
         original_loc = self.memory_card_copy_path
@@ -281,39 +359,27 @@ class Processor:
         self.logger.debug("Source: %s", original_loc)
         self.logger.debug("Destination: %s", new_loc)
 
-        # Define patterns to include
-        include_patterns = ['**/LOGS', '**/logs', '**/STATE/CACHE', '**/state/cache']
-        copied_count = 0
-        skipped_count = 0
-
-        for pattern in include_patterns:
-            self.logger.debug("Processing pattern: %s", pattern)
-            for source_path in original_loc.glob(pattern):
-                # Create relative path to maintain directory structure
-                relative_path = source_path.relative_to(original_loc)
-                destination_path = new_loc / relative_path
-
-                # Skip copying if files already exist and recopy_files is False
-                if destination_path.exists() and not self.recopy_files:
-                    self.logger.debug("Skipping existing directory: %s", destination_path)
-                    skipped_count += 1
-                    continue
-
-                # Create parent directories if they don't exist
-                destination_path.parent.mkdir(parents=True, exist_ok=True)
-
-                # Copy directory
-                if source_path.is_dir():
-                    self.logger.info('Copying %s to %s', source_path, destination_path)
-                    shutil.copytree(source_path, destination_path, dirs_exist_ok=True)
-                    copied_count += 1
-
+        index = self._get_file_index(original_loc)
+        source_files = {}
+        for source_path in self._get_source_directories():
+            # Create the directories to maintain directory structure, including empty ones
+            for path in index.find_directories(directory=source_path):
+                (new_loc / path.relative_to(original_loc)).mkdir(parents=True, exist_ok=True)
+            for path in index.get_files(directory=source_path):
+                source_files[Path(path)] = None
+
+        manifest = CopyManifest.load(new_loc / MANIFEST_FILENAME)
+        copied_count, skipped_count = sync_files(original_loc, new_loc, list(source_files), manifest,
+                                                 hash_files=self.hash_files, n_workers=self.copy_workers,
+                                                 trust_manifest=not self.recopy_files, mode=self.copy_mode)
+
+        self.invalidate_file_index(new_loc)
         self.logger.info("File copy complete. Copied: %d, Skipped: %d", copied_count, skipped_count)
 
 
     def _get_files_by_extension(self,directory_path: Path, extensions: list[str], as_string: bool = False) -> list:
         """
-        Get files from a directory with specified extensions.
+        Get files from a directory with specified extensions, answered from the cached file index.
 
         Args:
             directory_path (Path): Directory to search for files
@@ -323,9 +389,9 @@ class Processor:
         Returns:
             list: List of matching files as Path objects or strings
         """
-        files = [p for p in directory_path.rglob('*') if p.suffix in extensions]
-        if as_string:
-            files = [str(p) for p in files]
+        files = self._get_file_index(directory_path).get_files(extensions, directory=directory_path)
+        if not as_string:
+            files = [Path(p) for p in files]
         return files
 
     def _get_cache_files(self,as_string:bool=False):
@@ -385,27 +451,99 @@ class Processor:
                     shutil.copy2(cache_file, dest_file)
                     copied_count += 1
 
+        if copied_count > 0:
+            self.invalidate_file_index(self.mission_folder_path)
         self.logger.debug("Cache file copy complete. Copied: %d, Skipped: %d", copied_count, skipped_count)
 
     def _get_dbd_files(self,as_string=False):
         """
-        Get the dbd files from the memory card copy
+        Get the dbd files from the mission folder, or from the memory card copy when copy_mode is 'none',
+        ordered by file open time
         """
-        directory_path = self.mission_folder_path
         extensions = ['.dbd','.DBD','.ebd','.EBD']
-        dbd_files = self._get_files_by_extension(directory_path=directory_path,extensions=extensions,as_string=as_string)
+        if self.copy_mode == 'none':
+            dbd_files = []
+            for directory_path in self._get_source_directories():
+                dbd_files.extend(self._get_files_by_extension(directory_path=directory_path,extensions=extensions,as_string=True))
+        else:
+            directory_path = self.mission_folder_path
+            dbd_files = self._get_files_by_extension(directory_path=directory_path,extensions=extensions,as_string=True)
+        # Order the files by the open time in their header
+        dbd_files = list(self._get_file_metadata(dbd_files).index)
+        if not as_string:
+            dbd_files = [Path(f) for f in dbd_files]
         return dbd_files
 
-    def _read_dbd(self) -> dbdreader.MultiDBD:
+    def _filter_files_by_time(self, filenames: list) -> list:
         """
-        Read the files from the memory card copy
+        Drop the files holding only data outside mission_start_date and mission_end_date, before decoding
+
+        A file holds the data from its header open time up to the open time of the next file of the same
+        type (DBD or EBD). One file before and after the files overlapping the mission window are kept,
+        so interpolation at the edges of the window is unchanged. Files without an open time are kept.
+        If no dated file overlaps the window, all files are decoded.
+
+        Args:
+            filenames (list): Paths of the DBD/EBD files.
+
+        Returns:
+            list: The files to decode, in the order they were given.
         """
-        self.logger.info("Reading DBD files")
-        self._copy_files()
+        metadata = self._get_file_metadata(filenames)
+        known = metadata[metadata['fileopen_time'].notna()]
+        start, end = pd.Timestamp(self.mission_start_date), pd.Timestamp(self.mission_end_date)
+
+        keep = set()
+        file_types = known.index.map(lambda path: Path(path).suffix.lower())
+        for file_type in file_types.unique():
+            open_times = known.loc[file_types == file_type, 'fileopen_time']
+            # The last file is open ended
+            next_open_times = open_times.shift(-1)
+            overlapping = np.flatnonzero((open_times <= end).values &
+                                         (next_open_times.isna() | (next_open_times > start)).values)
+            if len(overlapping) == 0:
+                continue
+            first, last = max(overlapping[0] - 1, 0), min(overlapping[-1] + 1, len(open_times) - 1)
+            keep.update(open_times.index[first:last + 1])
+
+        # Without any dated file in the window the open times are not trusted, and all files are decoded
+        if not keep:
+            self.logger.warning("No DBD files open within %s to %s, decoding all files", start, end)
+            return filenames
+        keep.update(metadata.index[metadata['fileopen_time'].isna()])
+        filtered = [filename for filename in filenames if str(filename) in keep]
+        self.logger.info("Decoding %d of %d DBD files within %s to %s", len(filtered), len(filenames), start, end)
+        return filtered
+
+    def _prepare_files(self):
+        """
+        Copy the DBD and cache files into the mission folder
+        """
+        # Without copying the DBD files are read in place, only the cache files are copied
+        if self.copy_mode != 'none':
+            self._copy_files()
         self._copy_cache_files()
 
+    def _get_mission_dbd_files(self) -> list[str]:
+        """
+        Get the DBD files of the mission to decode, ordered by file open time
+        """
         filenames = self._get_dbd_files(as_string=True)
         self.logger.debug("Found %d DBD files", len(filenames))
+        return self._filter_files_by_time(filenames)
+
+    def _read_dbd(self, filenames: list|None = None) -> dbdreader.MultiDBD:
+        """
+        Read the files from the memory card copy
+
+        Args:
+            filenames (list | None): The DBD files to read, all files of the mission if None.
+        """
+        self.logger.info("Reading DBD files")
+        if filenames is None:
+            self._prepare_files()
+            filenames = self._get_mission_dbd_files()
+        self._dbd_filenames = list(filenames)
         self.logger.debug("DBD files: %s%s", [Path(f).name for f in filenames[:5]], '...' if len(filenames) > 5 else '')
 
         cacheDir = self._get_cache_files_path()
@@ -467,32 +605,32 @@ class Processor:
         sci_files = self._get_files_by_extension(directory_path=directory_path,extensions=extensions,as_string=True)
         return sci_files
 
-    def _get_random_sci_file(self):
+    def _get_file_metadata(self, files: list) -> pd.DataFrame:
         """
-        Get a random sci file from the mission folder
+        Get the header metadata of DBD/EBD files, from the header cache in the mission folder
+
+        Args:
+            files (list): Paths of DBD/EBD files.
+
+        Returns:
+            pd.DataFrame: The header metadata of the files, indexed by path and sorted by file open time.
         """
-        sci_files = self._get_sci_files()
-        random_file = random.choice(sci_files)
-        # Pick a new file if the file is empty
-        while os.stat(random_file).st_size == 0:
-            random_file = random.choice(sci_files)
-        return random_file
+        if self._header_cache is None:
+            self._header_cache = HeaderCache.load(self.mission_folder_path / '.dbd_headers.json')
+        return self._header_cache.get_metadata(files)
 
     def _get_full_filename(self):
         """
-        Get the full filename from the file
-        Args:
-            file (str): Path to the file to read.
+        Get the full filename from the header of the first non-empty sci file
 
         Returns:
             str: The extracted full filename, or None if not found.
         """
-        file = self._get_random_sci_file()
-        with open(file, errors="ignore") as fp:
-            for line in fp:
-                if 'full_filename' in line.strip():
-                    return line.replace('full_filename:', '').strip()
-        return None
+        metadata = self._get_file_metadata(self._get_sci_files())
+        metadata = metadata[(metadata['size'] > 0) & metadata['full_filename'].notna()]
+        if metadata.empty:
+            return None
+        return metadata['full_filename'].iloc[0]
 
     def _get_mission_year(self):
         """
@@ -546,9 +684,18 @@ class Processor:
         print(f'Invalid glider identifier: {glider_identifier}. Must be one of: {valid_options}')
         return None
 
-    def _get_dbd_data(self):
+    def _get_segment_cache(self) -> SegmentCache|None:
+        """
+        Get the cache of decoded DBD columns in the mission folder, None if segment_cache is off
+        """
+        if not self.segment_cache:
+            return None
+        max_bytes = None if self.segment_cache_mb is None else int(self.segment_cache_mb * 1024 * 1024)
+        return SegmentCache(self.mission_folder_path / '.segment_cache', max_bytes=max_bytes)
+
+    def _get_dbd_data(self, filenames: list|None = None):
         self.logger.info("Extracting data from DBD files")
-        self.dbd = self._read_dbd()
+        self.dbd = self._read_dbd(filenames)
 
         variables_to_get = self._get_mission_variable_data_source_names(filter_out_none=True)
         self.logger.info("Requesting %d variables", len(variables_to_get))
@@ -556,33 +703,21 @@ class Processor:
         variables_to_get = self._check_default_variables(variables_to_get)
 
         self.logger.info("Synchronizing data extraction...")
-        data = self.dbd.get_sync(*variables_to_get)
+        if self.decode_workers > 1 or self.segment_cache:
+            data = get_sync(self.dbd, *variables_to_get, n_workers=self.decode_workers,
+                            cache=self._get_segment_cache())
+        else:
+            data = self.dbd.get_sync(*variables_to_get)
         self.logger.info("Successfully extracted data with variables of: %s", variables_to_get)
 
         self.dbd.close()
         return data, variables_to_get
 
-    def _format_time(self,df:pd.DataFrame):
-        self.logger.debug("Formatting time data")
-        initial_rows = len(df)
-
-        # Convert time to datetime format and filter valid dates
-        df['time'] = pd.to_datetime(df['time'],unit='s', errors='coerce')
-        df = df.dropna(how='all')
-        after_dropna = len(df)
-
-        valid_dates_mask = (df['time'] >= self.mission_start_date) & \
-                           (df['time'] <= self.mission_end_date)
-        df = df.loc[valid_dates_mask]
-        final_rows = len(df)
-
-        self.logger.info("Time filtering: %d -> %d -> %d rows", initial_rows, after_dropna, final_rows)
-        if final_rows > 0:
-            self.logger.info("Time range: %s to %s", df['time'].min(), df['time'].max())
-        else:
-            self.logger.warning("No data remaining after time filtering")
-
-        return df
+    def _time_mask(self, time) -> np.ndarray:
+        """
+        Get the mask of the times within mission_start_date and mission_end_date, False for missing times
+        """
+        return np.asarray((time >= self.mission_start_date) & (time <= self.mission_end_date))
 
     def _calculate_vars(self,df):
         self.logger.info("Performing variable calculations and conversions")
@@ -617,41 +752,125 @@ class Processor:
         """
         Update the dataframe columns with the mission variables.
         Adjusting the current column names, which are data source names, to their short_name values.
+        The columns are renamed in place, without copying their data.
         """
         column_map = {value.data_source_name: value.short_name for value in self.mission_vars}
-        df = df.rename(columns=column_map)
+        df.columns = [column_map.get(name, name) for name in df.columns]
         return df
 
-    def _convert_dbd_to_dataframe(self):
+    def _apply_variable_dtypes(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Cast the dataframe columns, such as the calculated ones, to the dtype of their mission variable
+        """
+        for var in self.mission_vars:
+            if var.short_name in df.columns and df[var.short_name].dtype != var.dtype:
+                df[var.short_name] = df[var.short_name].astype(var.dtype)
+        return df
+
+    def _get_dtype_encoding(self) -> dict:
+        """
+        Get the encoding storing the mission variables and their gridded versions in their dtype
+        """
+        encoding = {}
+        for var in self.mission_vars:
+            for name in [var.short_name, f'g_{var.short_name}']:
+                if self.ds is not None and name in self.ds.variables:
+                    encoding[name] = {'dtype': var.dtype}
+        return encoding
+
+    def _get_encoding(self, unlimited_dims=()) -> dict:
+        """
+        Get the NetCDF encoding of the dataset, storing the mission variables and their gridded versions in their dtype,
+        compressed, chunked and packed as set by encoding_profile
+        """
+        encoding = self._get_dtype_encoding()
+        if self.ds is not None and self.encoding_profile is not None:
+            profile_encoding = get_encoding(self.ds, self.encoding_profile, variables=self.mission_vars,
+                                            unlimited_dims=unlimited_dims)
+            for name, var_encoding in profile_encoding.items():
+                encoding[name] = encoding.get(name, {}) | var_encoding
+        return encoding
+
+    def _convert_dbd_to_dataframe(self, filenames: list|None = None):
         """
         Get the dbd data as a dataframe
+
+        Args:
+            filenames (list | None): The DBD files to decode, all files of the mission if None.
         """
-        data, variables_retrieved = self._get_dbd_data()
-        df = pd.DataFrame(data).T
-        new_column_names = ['time']
-        new_column_names.extend(variables_retrieved)
-        if len(df.columns) != len(new_column_names):
-            print(f'The number of columns in the dataframe does not match the number of mission variables, {df.columns} vs {new_column_names}')
-        # Add names to the dataframe columns
-        df.columns = new_column_names
-        # Format time
-        df = self._format_time(df)
+        data, variables_retrieved = self._get_dbd_data(filenames)
+        df = self._build_dataframe(data, variables_retrieved)
         # Calculate variables
         df = self._calculate_vars(df)
-        # Set time as index
-        df = df.set_index('time')
         df = self._update_dataframe_columns(df)
+        df = self._apply_variable_dtypes(df)
         return df
 
+    def _build_dataframe(self, data: tuple, variables: list) -> pd.DataFrame:
+        """
+        Build a time indexed dataframe from the time and value arrays returned by get_sync
+
+        The frame is built column by column from the arrays, keeping only the rows within mission_start_date
+        and mission_end_date, so every column is copied once, in the dtype of its mission variable.
+        Rows without a valid time are dropped.
+
+        Args:
+            data (tuple): The time in seconds, followed by the values of every variable.
+            variables (list): Names of the variables.
+
+        Returns:
+            pd.DataFrame: The variables indexed by time.
+        """
+        if len(data) != len(variables) + 1:
+            self.logger.warning("The number of columns in the dataframe does not match the number of mission variables, "
+                                "%d vs %d", len(data), len(variables) + 1)
+        time = pd.to_datetime(data[0], unit='s', errors='coerce')
+        valid_dates_mask = self._time_mask(time)
+        dtypes = {var.data_source_name: var.dtype for var in self.mission_vars if var.data_source_name is not None}
+        columns = {name: np.asarray(values)[valid_dates_mask].astype(dtypes.get(name, 'float64'), copy=False)
+                   for name, values in zip(variables, data[1:])}
+        df = pd.DataFrame(columns, index=pd.DatetimeIndex(time[valid_dates_mask], name='time'), copy=False)
+
+        self.logger.info("Time filtering: %d -> %d rows", len(time), len(df))
+        if len(df) > 0:
+            self.logger.info("Time range: %s to %s", df.index.min(), df.index.max())
+        else:
+            self.logger.warning("No data remaining after time filtering")
+        return df
+
+    def _dataset_from_dataframe(self, df: pd.DataFrame) -> xr.Dataset:
+        """
+        Build a dataset of the science variables, along time, and the engineering variables, along m_time, of a dataframe
+
+        The variables are built straight from the column arrays of the dataframe, sharing their memory,
+        and both time coordinates share the index array. The two dimensions are independent, so no alignment is needed.
+        """
+        time = df.index.to_numpy()
+        eng_vars = [name for name in df.columns if name in self.eng_vars]
+        sci_vars = [name for name in df.columns if name not in eng_vars]
+        # Variables named after their dimension become the time coordinates, in the order of a merge
+        variables = {name: ('time', df[name].to_numpy()) for name in sci_vars}
+        variables['time'] = ('time', time)
+        variables |= {name: ('m_time', df[name].to_numpy()) for name in eng_vars}
+        variables['m_time'] = ('m_time', time)
+        return xr.Dataset(variables)
+
+    def _split_ds(self, ds: xr.Dataset):
+        """
+        Cache the science and engineering variables of a dataset as sci_ds and eng_ds, sharing its data
+        """
+        self._sci_ds = ds[[name for name in ds.data_vars if ds[name].dims == ('time',)]]
+        self._eng_ds = ds[[name for name in ds.data_vars if ds[name].dims == ('m_time',)]]
+
     def _generate_ds(self):
         """
         Generate a xarray dataset from the dataframe
         """
         self.logger.info("Generating xarray dataset")
 
-        # self.ds = xr.Dataset.from_dataframe(self.df)
-        self.logger.debug("Merging science and engineering datasets")
-        self.ds = xr.merge([self.sci_ds, self.eng_ds])
+        self.logger.debug("Building science and engineering variables")
+        self.ds = self._dataset_from_dataframe(self.df)
+        self._split_ds(self.ds)
         self.logger.info("Created dataset with %d variables and %d coordinates", len(self.ds.data_vars), len(self.ds.coords))
 
         self.logger.debug("Adding global attributes")
@@ -713,7 +932,8 @@ class Processor:
         if self.ds is None:
             self.logger.error("Dataset not generated yet, run process() first")
             raise ValueError("Dataset not generated yet, run process() first")
-        ds_gridded = Gridder(self.ds).create_gridded_dataset()
+        ds_gridded = Gridder(self.ds, n_workers=self.n_workers, method=self.gridding_method,
+                             derived_variables=self.derived_variables).create_gridded_dataset()
         self.ds.update(ds_gridded)
 
     def process(self,return_ds=True):
@@ -734,13 +954,236 @@ class Processor:
         if return_ds:
             return self.ds
 
+    def _file_record_path(self, save_path: Path) -> Path:
+        """
+        Get the path of the record of the DBD files ingested into an output file
+        """
+        return save_path.with_name(f'.{save_path.stem}_files.json')
+
+    def _record_ingested_files(self, save_path: Path, filenames: list, record: CopyManifest|None = None):
+        """
+        Record the name, size and CRC32 checksum of the DBD files ingested into an output file
+
+        Args:
+            save_path (Path): The output file.
+            filenames (list): Paths of the ingested DBD files.
+            record (CopyManifest | None): Record to add the files to, a new record if None.
+        """
+        if record is None:
+            record = CopyManifest(self._file_record_path(save_path))
+        for filename in filenames:
+            name = Path(filename).name
+            record.entries[name] = file_signature(filename, record.entries.get(name))
+        record.save()
+
+    def _is_appendable(self, save_path: Path) -> bool:
+        """
+        Check that rows can be appended to an output file, written by save() in incremental mode
+        """
+        with netCDF4.Dataset(save_path) as nc:
+            for dim in ['time', 'm_time']:
+                if dim not in nc.dimensions or not nc.dimensions[dim].isunlimited():
+                    return False
+                if getattr(nc[dim], 'units', None) != TIME_ENCODING['units']:
+                    return False
+            # Gridded profiles cannot be updated in place
+            if 'profile' in nc.dimensions:
+                return False
+            if 'g_time' in nc.dimensions and not nc.dimensions['g_time'].isunlimited():
+                return False
+        return True
+
+    def _get_new_files(self, record: CopyManifest) -> list|None:
+        """
+        Get the DBD files of the mission that are not in an output file yet
+
+        Recorded files are compared by size and CRC32 checksum, the checksum is only computed again for
+        files whose modification time changed. The last ingested file of each type (DBD or EBD) before
+        the new files is included, so the time synchronization at the start of the new files is unchanged.
+
+        Returns:
+            list | None: The files to decode, in order of open time, empty if there are no new files,
+            None if an ingested file changed and the output has to be rebuilt.
+        """
+        self._prepare_files()
+        filenames = self._get_mission_dbd_files()
+
+        new_files = set()
+        for filename in filenames:
+            name = Path(filename).name
+            entry = record.entries.get(name)
+            if entry is None:
+                new_files.add(filename)
+                continue
+            signature = file_signature(filename, entry)
+            if (signature['size'], signature['crc']) != (entry['size'], entry['crc']):
+                self.logger.info("%s changed since it was ingested", name)
+                return None
+            record.entries[name] = signature
+
+        to_decode = set()
+        previous_files = {}
+        for filename in filenames:
+            file_type = Path(filename).suffix.lower()
+            if filename in new_files:
+                if file_type in previous_files:
+                    to_decode.add(previous_files.pop(file_type))
+                to_decode.add(filename)
+            else:
+                previous_files[file_type] = filename
+        if new_files:
+            self.logger.info("Found %d new DBD files", len(new_files))
+        return [filename for filename in filenames if filename in to_decode]
+
+    def _grid_appended_rows(self, ds_saved: xr.Dataset, ds_new: xr.Dataset, max_pressure: float,
+                            lat: float, lon: float) -> tuple[int, xr.Dataset|None]:
+        """
+        Grid the time bins touched by appended rows, from the bin holding the first new row on
+
+        The bins are gridded with the pressure levels of the output file and the mean position of the
+        full mission, so they match the bins of gridding the full mission.
+
+        Args:
+            ds_saved (xr.Dataset): The output file before appending.
+            ds_new (xr.Dataset): The appended rows.
+            max_pressure (float): Maximum pressure of the full mission.
+            lat, lon (float): Mean position of the full mission.
+
+        Returns:
+            tuple[int, xr.Dataset | None]: Index of the first gridded bin in the output file and the
+            gridded bins, None if the new rows hold no pressure.
+        """
+        interval_h = fields(Gridder).interval_h.default
+        new_times = ds_new.time.values[~np.isnan(ds_new['pressure'].values)]
+        g_time = ds_saved.g_time.values
+        if len(new_times) == 0:
+            return len(g_time), None
+
+        bin_interval = np.timedelta64(int(interval_h), 'h')
+        # Bins include both edges, so a new row on the end edge g_time[j] also belongs to bin j
+        first_bin = np.searchsorted(g_time, new_times.min(), side='left')
+        window_start = g_time[0] - bin_interval + first_bin * bin_interval
+        end_time = _round_time_bounds(window_start, new_times.max(), interval_h)[1]
+
+        # The saved rows of the touched bins, followed by the new rows
+        time_vars = [name for name, variable in ds_saved.data_vars.items() if variable.dims == ('time',)]
+        first_row = np.searchsorted(ds_saved.time.values, window_start, side='left')
+        ds_window = xr.concat([ds_saved[time_vars].isel(time=slice(first_row, None)).load(),
+                               ds_new[[name for name in time_vars if name in ds_new]]], dim='time')
+
+        gridder = Gridder(ds_window, n_workers=self.n_workers, method=self.gridding_method,
+                          derived_variables=self.derived_variables, max_pressure=max_pressure,
+                          time_bounds=(window_start, end_time), position=(lat, lon))
+        return first_bin, gridder.create_gridded_dataset()
+
+    def _append_new_files(self, save_path: Path) -> bool:
+        """
+        Decode the DBD files not yet in an output file and append their rows to it
+
+        The new rows are appended along time and m_time, the time bins they touch are gridded again
+        and the time coverage and geospatial bounds in the global attributes are updated.
+
+        Args:
+            save_path (Path): The output file, written by save() in incremental mode.
+
+        Returns:
+            bool: True if the output file is up to date, False if it has to be rebuilt.
+        """
+        record_path = self._file_record_path(save_path)
+        if not save_path.exists() or not record_path.exists() or not self._is_appendable(save_path):
+            return False
+        record = CopyManifest.load(record_path)
+        if not record.entries:
+            return False
+
+        filenames = self._get_new_files(record)
+        if filenames is None:
+            return False
+        new_files = [filename for filename in filenames if Path(filename).name not in record.entries]
+        if not new_files:
+            self.logger.info("No new DBD files, %s is up to date", save_path)
+            record.save()
+            return True
+        df = self._convert_dbd_to_dataframe(filenames)
+
+        with xr.open_dataset(save_path) as ds_saved:
+            # Only the rows after the saved ones are new, the rest belong to the previously last files
+            last_time = ds_saved.time.values.max()
+            df = df[df.index > last_time]
+            if df.empty:
+                self.logger.info("The new DBD files hold no rows after %s", pd.to_datetime(last_time))
+                self._record_ingested_files(save_path, new_files, record)
+                return True
+            ds_new = self._dataset_from_dataframe(df)
+            for var in self.mission_vars:
+                if var.short_name in ds_new:
+                    ds_new[var.short_name].attrs = var.to_dict()
+
+            time = np.concatenate([ds_saved.time.values, ds_new.time.values])
+            mission = {name: np.concatenate([ds_saved[name].values, ds_new[name].values])
+                       for name in ['latitude', 'longitude', 'depth', 'pressure']}
+            n_time, n_m_time = ds_saved.sizes['time'], ds_saved.sizes['m_time']
+
+            ds_gridded = None
+            if self.include_gridded_data and 'g_time' in ds_saved.dims:
+                interval_p = fields(Gridder).interval_p.default
+                max_pressure = np.nanmax(mission['pressure'])
+                if len(np.arange(0, max_pressure, interval_p)) != ds_saved.sizes['g_pres']:
+                    self.logger.info("The new rows extend the pressure grid")
+                    return False
+                first_bin, ds_gridded = self._grid_appended_rows(
+                    ds_saved, ds_new, max_pressure,
+                    lat=np.nanmean(mission['latitude']), lon=np.nanmean(mission['longitude']))
+
+        write_netcdf_rows(save_path, ds_new, 'time', n_time)
+        write_netcdf_rows(save_path, ds_new, 'm_time', n_m_time)
+        self.logger.info("Appended %d rows to %s", len(df), save_path)
+        if ds_gridded is not None:
+            write_netcdf_rows(save_path, ds_gridded, 'g_time', first_bin)
+            self.logger.info("Gridded %d time bins", ds_gridded.sizes['g_time'])
+
+        # Update the attributes that depend on the data
+        global_attrs = get_global_attrs(wmo_id=self.wmo_id, mission_title=self.mission_title,
+                                        longitude=mission['longitude'], latitude=mission['latitude'],
+                                        depth=mission['depth'], time=time)
+        with netCDF4.Dataset(save_path, 'a') as nc:
+            nc.setncatts({key: value for key, value in global_attrs.items()
+                          if key.startswith(('geospatial_', 'time_coverage_')) or key == 'date_modified'})
+
+        self._record_ingested_files(save_path, new_files, record)
+        return True
+
     def save(self,save_path=None):
-        if self.ds is None:
-            self.logger.info("Dataset not generated yet, running process()")
-            self.process()
+        """
+        Save the dataset to a NetCDF file, processing it first if needed
+
+        In incremental mode the DBD files in the output file are recorded next to it, and later saves
+        only decode the new files and append their rows. The output is rebuilt when an ingested file
+        changed or the new rows do not fit the pressure grid.
 
+        Args:
+            save_path (Path | None): The output file, netcdf_output_path if None.
+
+        Returns:
+            xr.Dataset | None: The saved dataset, None if new rows were appended to an existing file.
+        """
         if save_path is None:
             save_path = self.netcdf_output_path
+        save_path = Path(save_path)
+
+        if self.incremental and self.ds is None:
+            # Create directory if it doesn't exist
+            save_path.parent.mkdir(parents=True, exist_ok=True)
+            if self._append_new_files(save_path):
+                return None
+            self.logger.info("Rebuilding %s", save_path)
+            self.dbd = None
+            self._df = None
+            self._sci_df = self._eng_df = self._sci_ds = self._eng_ds = None
+
+        if self.ds is None:
+            self.logger.info("Dataset not generated yet, running process()")
+            self.process()
 
         self.logger.info("Saving dataset to: %s", save_path)
 
@@ -751,10 +1194,128 @@ class Processor:
         if self.ds is None:
             self.logger.error("Dataset not generated yet, run process() first")
             raise ValueError("Dataset not generated yet, run process() first")
-        self.ds.to_netcdf(save_path)
+        if self.incremental:
+            # Rows are appended along the unlimited time dimensions by later saves
+            time_dims = [dim for dim in ['time', 'm_time', 'g_time'] if dim in self.ds.dims]
+            encoding = self._get_encoding(unlimited_dims=time_dims)
+            for dim in time_dims:
+                encoding[dim] = encoding.get(dim, {}) | TIME_ENCODING
+            self.ds.to_netcdf(save_path, unlimited_dims=time_dims, encoding=encoding)
+            self._record_ingested_files(save_path, self._dbd_filenames or [])
+        else:
+            self.ds.to_netcdf(save_path, encoding=self._get_encoding())
         save_time = pd.Timestamp.now() - start_time
 
         file_size_mb = save_path.stat().st_size / (1024 * 1024)
         self.logger.info("Dataset saved successfully (%.2f MB) in %.2f seconds", file_size_mb, save_time.total_seconds())
+        self.logger.info("Compression ratio: %.2f (%.2f MB in memory, encoding profile %s)",
+                         self.ds.nbytes / save_path.stat().st_size, self.ds.nbytes / (1024 * 1024), self.encoding_profile)
 
         return self.ds
+
+    def save_zarr(self, store_path=None, append: bool = True, chunk_mb: float = 1, n_workers: int = 4):
+        """
+        Save the dataset to a chunked Zarr store, processing it first if needed
+
+        The time series and the gridded product are written to the timeseries and gridded groups of a local
+        store, in chunks of whole rows along time, m_time and g_time, with the chunks written in parallel.
+        If the store exists and append is True, only the rows after the last stored times are appended, so a new
+        deployment segment is added without rewriting the stored chunks, and the time coverage and geospatial
+        bounds in the global attributes are updated. The last stored time bin of the grid is written again, as it
+        may have been gridded from part of its rows. Grids by profile are only written to new stores.
+
+        Args:
+            store_path (Path | None): The store directory, netcdf_output_path with a .zarr suffix if None.
+            append (bool): If True, append to an existing store, otherwise replace it.
+            chunk_mb (float): Target chunk size in MB.
+            n_workers (int): Number of threads writing chunks.
+
+        Returns:
+            Path: The store directory.
+        """
+        if store_path is None:
+            store_path = self.netcdf_output_path.with_suffix('.zarr')
+        store_path = Path(store_path)
+
+        if self.ds is None:
+            self.logger.info("Dataset not generated yet, running process()")
+            self.process()
+        if self.ds is None:
+            self.logger.error("Dataset not generated yet, run process() first")
+            raise ValueError("Dataset not generated yet, run process() first")
+
+        start_time = pd.Timestamp.now()
+        groups = split_zarr_groups(self.ds)
+        if append and has_zarr_group(store_path, 'timeseries'):
+            self.logger.info("Appending dataset to: %s", store_path)
+            with xr.open_zarr(store_path, group='timeseries') as stored:
+                new_rows = self.ds.time.values > stored.time.values.max()
+                mission = {name: np.concatenate([stored[name].values, self.ds[name].values[new_rows]])
+                           for name in ['latitude', 'longitude', 'depth', 'time']}
+                attrs = dict(stored.attrs)
+            # Update the attributes that depend on the data
+            global_attrs = get_global_attrs(wmo_id=self.wmo_id, mission_title=self.mission_title,
+                                            longitude=mission['longitude'], latitude=mission['latitude'],
+                                            depth=mission['depth'], time=mission['time'])
+            attrs |= {key: value for key, value in global_attrs.items()
+                      if key.startswith(('geospatial_', 'time_coverage_')) or key == 'date_modified'}
+
+            for group, ds_group in groups.items():
+                if not any(dim in ds_group.dims for dim in ZARR_GROUPS[group]):
+                    self.logger.warning("The %s group has no %s dimension to append along, not appending it",
+                                        group, ' or '.join(ZARR_GROUPS[group]))
+                    continue
+                ds_group.attrs = attrs
+                # The last stored time bin may have been gridded from part of its rows, so it is gridded again
+                n_rows = append_zarr(ds_group, store_path, group, n_workers=n_workers,
+                                     rewrite_last=group == 'gridded')
+                self.logger.info("Appended %d rows to the %s group", n_rows, group)
+        else:
+            self.logger.info("Saving dataset to: %s", store_path)
+            for group in ZARR_GROUPS:
+                if group not in groups and has_zarr_group(store_path, group):
+                    shutil.rmtree(store_path / group)
+            encoding = self._get_dtype_encoding()
+            for group, ds_group in groups.items():
+                write_zarr(ds_group, store_path, group, chunk_mb=chunk_mb, encoding=encoding, n_workers=n_workers)
+        save_time = pd.Timestamp.now() - start_time
+
+        self.logger.info("Zarr store saved successfully in %.2f seconds", save_time.total_seconds())
+        return store_path
+
+    def save_parquet(self, parquet_path=None, row_group_rows: int = 16384):
+        """
+        Save the time series table, df, to a Parquet dataset partitioned by day
+
+        Every day is written to its own date=YYYY-MM-DD directory, in row groups of row_group_rows rows with column
+        statistics, so scans can skip days and row groups by time and by value. The attributes of the mission variables
+        are stored as field metadata and the global attributes as schema metadata. Saving again replaces the saved days
+        that are in df.
+
+        Args:
+            parquet_path (Path | None): The dataset directory, netcdf_output_path with a .parquet suffix if None.
+            row_group_rows (int): Number of rows of every row group.
+
+        Returns:
+            Path: The dataset directory.
+        """
+        if parquet_path is None:
+            parquet_path = self.netcdf_output_path.with_suffix('.parquet')
+        parquet_path = Path(parquet_path)
+        self.logger.info("Saving time series table to: %s", parquet_path)
+
+        start_time = pd.Timestamp.now()
+        df = self.df
+        column_attrs = {var.short_name: var.to_dict() for var in self.mission_vars if var.short_name in df.columns}
+        if self.ds is not None:
+            global_attrs = self.ds.attrs
+        else:
+            global_attrs = get_global_attrs(wmo_id=self.wmo_id, mission_title=self.mission_title,
+                                            longitude=df['longitude'].values, latitude=df['latitude'].values,
+                                            depth=df['depth'].values, time=df.index.values)
+        n_days = write_parquet(df, parquet_path, column_attrs=column_attrs, global_attrs=global_attrs,
+                               row_group_rows=row_group_rows)
+        save_time = pd.Timestamp.now() - start_time
+
+        self.logger.info("Saved %d rows of %d days in %.2f seconds", len(df), n_days, save_time.total_seconds())
+        return parquet_path
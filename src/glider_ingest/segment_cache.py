@@ -0,0 +1,116 @@
+'''
+Module containing the on-disk cache of decoded DBD/EBD columns.
+'''
+from attrs import define, field
+from pathlib import Path
+import numpy as np
+import logging
+import os
+import shutil
+
+
+def segment_key(filename: str, sensor_list_crc: str|None) -> str:
+    '''
+    Cache key of a DBD/EBD file, from its name, size, modification time and sensor list CRC.
+
+    Args:
+        filename (str): The DBD/EBD file.
+        sensor_list_crc (str | None): The ``sensor_list_crc`` of the file header.
+
+    Returns:
+        str: The cache key.
+    '''
+    stat = os.stat(filename)
+    return f'{Path(filename).name}-{stat.st_size}-{stat.st_mtime_ns}-{sensor_list_crc}'
+
+
+@define
+class SegmentCache:
+    '''
+    Cache of the columns decoded from DBD/EBD files, one directory per file and one ``.npy`` file per column.
+
+    Every column holds the time and values of a parameter in a (2, n) array, so a file whose cached
+    columns miss a parameter only has that parameter decoded. Entries are used in least recently used
+    order, the modification time of an entry directory is its last use, and the least recently used
+    entries are evicted once the cache is larger than `max_bytes`.
+
+    Attributes:
+        directory (Path): Directory holding the cache.
+        max_bytes (int | None): Size cap of the cache in bytes, no cap if None.
+    '''
+    directory: Path
+    max_bytes: int|None = field(default=None)
+
+    @property
+    def logger(self):
+        """Get the logger instance for this cache."""
+        return logging.getLogger('glider_ingest')
+
+    def load(self, key: str, parameters: list) -> dict:
+        '''
+        Get the cached columns of a file.
+
+        Args:
+            key (str): Cache key of the file, see `segment_key`.
+            parameters (list): Parameter names.
+
+        Returns:
+            dict: The time and values of the cached parameters, keyed by parameter name.
+        '''
+        entry_dir = Path(self.directory) / key
+        columns = {}
+        for parameter in parameters:
+            try:
+                column = np.load(entry_dir / f'{parameter}.npy')
+            except (OSError, ValueError):
+                continue
+            columns[parameter] = (column[0], column[1])
+        if columns:
+            os.utime(entry_dir)
+        return columns
+
+    def save(self, key: str, columns: dict):
+        '''
+        Add columns of a file to the cache.
+
+        Args:
+            key (str): Cache key of the file, see `segment_key`.
+            columns (dict): The time and values of parameters, keyed by parameter name.
+        '''
+        entry_dir = Path(self.directory) / key
+        entry_dir.mkdir(parents=True, exist_ok=True)
+        for parameter, (time, values) in columns.items():
+            path = entry_dir / f'{parameter}.npy'
+            tmp_path = path.with_name(path.name + '.tmp')
+            with open(tmp_path, 'wb') as f:
+                np.save(f, np.vstack([time, values]))
+            tmp_path.replace(path)
+
+    def evict(self) -> int:
+        '''
+        Remove the least recently used entries until the cache is no larger than `max_bytes`.
+
+        Returns:
+            int: The number of removed entries.
+        '''
+        if self.max_bytes is None or not Path(self.directory).exists():
+            return 0
+        entries = []
+        with os.scandir(self.directory) as entry_dirs:
+            for entry_dir in entry_dirs:
+                if entry_dir.is_dir():
+                    with os.scandir(entry_dir.path) as columns:
+                        size = sum(column.stat().st_size for column in columns)
+                    entries.append((entry_dir.stat().st_mtime_ns, size, entry_dir.path))
+
+        total = sum(size for _, size, _ in entries)
+        removed_count = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            removed_count += 1
+        if removed_count > 0:
+            self.logger.debug("Evicted %d decoded files from the segment cache", removed_count)
+        return removed_count
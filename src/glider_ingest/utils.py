@@ -5,6 +5,7 @@ Module containing utility functions for the package.
 # Import Packages
 import numpy as np
 import xarray as xr
+import netCDF4
 import datetime
 from functools import wraps
 from time import time
@@ -172,6 +173,10 @@ def get_wmo_id(glider_id: str | int) -> str:
     return wmo_ids[glider_id]
 
 
+# Encoding of the datetime coordinates of NetCDF files that rows are appended to
+TIME_ENCODING = {'units': 'seconds since 1970-01-01', 'dtype': 'float64'}
+
+
 def setup_logging(level: str = 'INFO') -> None:
     """Configure logging for the package. With specific name and format.
 
@@ -201,3 +206,108 @@ def setup_logging(level: str = 'INFO') -> None:
 
     # Always update the log level (this allows dynamic level changes)
     logger.setLevel(getattr(logging, level))
+
+
+def find_profiles(pressure: np.ndarray, hysteresis: float = 1.0, min_extent: float = 10.0) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Find the dive and climb segments of a glider pressure record.
+
+    Parameters
+    ----------
+    pressure : np.ndarray
+        Pressure values ordered in time, without NaN values.
+    hysteresis : float, optional
+        Reversals smaller than this many dbar are treated as noise, by default 1.0
+    min_extent : float, optional
+        Minimum vertical extent in dbar of a segment to count as a profile, by default 10.0
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray, np.ndarray]
+        Start (inclusive) and stop (exclusive) sample offsets of every profile, and its
+        direction, 1 for a dive and -1 for a climb.
+
+    Notes
+    -----
+    The sign of the pressure derivative is run-length encoded in one pass. Runs whose
+    vertical extent is below `hysteresis` and smaller than both neighbours are then
+    merged into their neighbours, repeating until no such run is left. Each round works
+    on the runs rather than the samples and only a few rounds are needed in practice.
+    Neighbouring profiles share their turning point sample.
+    """
+    pressure = np.asarray(pressure, dtype=float)
+    n = len(pressure)
+    empty = np.array([], dtype=int)
+    if n < 2:
+        return empty, empty, empty
+
+    # Direction of every step, carrying the last direction over flat stretches
+    sign = np.sign(np.diff(pressure)).astype(int)
+    moving = np.flatnonzero(sign)
+    if len(moving) == 0:
+        return empty, empty, empty
+    sign = sign[moving[np.maximum(np.searchsorted(moving, np.arange(n - 1), side='right') - 1, 0)]]
+
+    # Runs of constant direction, each run ends on the sample the next one starts at
+    starts = np.flatnonzero(np.r_[True, sign[1:] != sign[:-1]])
+    directions = sign[starts]
+
+    while len(starts) > 1:
+        stops = np.r_[starts[1:], n - 1]
+        extent = np.abs(pressure[stops] - pressure[starts])
+        left = np.r_[np.inf, extent[:-1]]
+        right = np.r_[extent[1:], np.inf]
+        noise = (extent < hysteresis) & (extent < left) & (extent <= right)
+        if not noise.any():
+            break
+        # Removing an interior run merges the following run into the preceding one
+        interior = np.zeros(len(starts), dtype=bool)
+        interior[1:-1] = True
+        keep = ~noise & ~np.r_[False, (noise & interior)[:-1]]
+        starts = starts[keep]
+        directions = directions[keep]
+        starts[0] = 0
+        # Chains of merges can leave neighbouring runs in the same direction
+        changed = np.r_[True, directions[1:] != directions[:-1]]
+        starts = starts[changed]
+        directions = directions[changed]
+
+    stops = np.r_[starts[1:], n - 1]
+    is_profile = np.abs(pressure[stops] - pressure[starts]) >= min_extent
+    return starts[is_profile], stops[is_profile] + 1, directions[is_profile]
+
+
+def write_netcdf_rows(path, ds: xr.Dataset, dim: str, offset: int) -> None:
+    """Write the rows of a dataset along a dimension into an existing NetCDF file.
+
+    Rows from ``offset`` on are overwritten and rows past the end of the file are appended, so the
+    dimension must be unlimited in the file. Datetime values are written as seconds since 1970,
+    matching `TIME_ENCODING`, and missing values of packed variables are written as their fill value.
+    Variables of the dataset that are not in the file are skipped.
+
+    Parameters
+    ----------
+    path : str or Path
+        The NetCDF file to write into.
+    ds : xr.Dataset
+        Dataset holding the rows to write.
+    dim : str
+        The dimension the rows are along.
+    offset : int
+        Index in the file of the first row.
+    """
+    n_rows = ds.sizes[dim]
+    with netCDF4.Dataset(path, 'a') as nc:
+        for var_name, variable in ds.variables.items():
+            if dim not in variable.dims or var_name not in nc.variables:
+                continue
+            values = variable.values
+            if np.issubdtype(values.dtype, np.datetime64):
+                values = (values - np.datetime64('1970-01-01')) / np.timedelta64(1, 's')
+            elif 'scale_factor' in nc[var_name].ncattrs():
+                # Packed variables take the fill value for NaN only from masked values
+                missing = np.isnan(values)
+                values = np.ma.masked_array(np.where(missing, 0, values), mask=missing)
+            index = tuple(slice(offset, offset + n_rows) if variable_dim == dim else slice(None)
+                          for variable_dim in variable.dims)
+            nc[var_name][index] = values
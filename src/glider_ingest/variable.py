@@ -40,6 +40,7 @@ class Variable:
 
     # Variable operation attributes
     to_grid: bool|str = field(default=False)  # If you want the variable to be gridded: True
+    dtype: str = field(default='float64')  # Storage dtype of the variable in the dataset and NetCDF file, e.g. 'float32'
 
     # Glider specific attributes
     id: str|None = field(default=None)
@@ -113,7 +114,8 @@ class Variable:
         self.to_grid = f'{self.to_grid}'
         self.data_source_name = str(self.data_source_name)
 
-        return {key:value for key,value in asdict(self).items() if value is not None}
+        # The storage dtype is not an attribute of the variable
+        return {key:value for key,value in asdict(self).items() if value is not None and key != 'dtype'}
 
     def to_dict(self):
         """
@@ -0,0 +1,174 @@
+'''
+Module to write the mission datasets to chunked Zarr stores and append new segments to them.
+'''
+from importlib.util import find_spec
+from pathlib import Path
+import numpy as np
+import xarray as xr
+import logging
+
+from .utils import TIME_ENCODING
+
+# Dimensions new segments are appended along, in the time series and gridded groups of a store
+ZARR_GROUPS = {'timeseries': ['time', 'm_time'], 'gridded': ['g_time']}
+
+
+def _check_zarr():
+    '''
+    Raise an ImportError if zarr, needed by xarray to write Zarr stores, is not installed.
+    '''
+    if find_spec('zarr') is None:
+        raise ImportError("Writing Zarr stores requires zarr, install the zarr extra with "
+                          "`pip install glider-ingest[zarr]`")
+
+
+def has_zarr_group(path: Path, group: str) -> bool:
+    '''
+    Check that a local Zarr store holds a group.
+    '''
+    return (Path(path) / group).is_dir()
+
+
+def split_zarr_groups(ds: xr.Dataset) -> dict:
+    '''
+    Split a mission dataset into the time series and the gridded product.
+
+    Args:
+        ds (xr.Dataset): The mission dataset.
+
+    Returns:
+        dict: The datasets of the ``'timeseries'`` variables, along time and m_time, and of the
+        ``'gridded'`` variables, along any other dimension, with the global attributes of `ds`.
+        Groups without variables are left out.
+    '''
+    time_dims = set(ZARR_GROUPS['timeseries'])
+    names = {'timeseries': [name for name in ds.data_vars if set(ds[name].dims) <= time_dims]}
+    names['gridded'] = [name for name in ds.data_vars if name not in names['timeseries']]
+    return {group: ds[group_names] for group, group_names in names.items() if group_names}
+
+
+def _chunk_rows(ds: xr.Dataset, dim: str, chunk_mb: float) -> int:
+    '''
+    Number of rows along a dimension that fit `chunk_mb` in the widest variable along it.
+    '''
+    row_bytes = max(ds[name].dtype.itemsize * ds[name].size // ds.sizes[dim]
+                    for name in ds.variables if dim in ds[name].dims)
+    return max(1, int(chunk_mb * 1024 * 1024) // max(1, row_bytes))
+
+
+def _segment_chunks(n_rows: int, chunk_rows: int, n_stored: int) -> tuple:
+    '''
+    Chunks of rows appended after `n_stored` rows, aligned to the chunks of the store.
+
+    The first chunk fills the last, partial chunk of the store, so every chunk is written by a single task.
+    '''
+    first = min(n_rows, chunk_rows - n_stored % chunk_rows)
+    chunks = [first] + [chunk_rows] * ((n_rows - first) // chunk_rows)
+    if sum(chunks) < n_rows:
+        chunks.append(n_rows - sum(chunks))
+    return tuple(chunk for chunk in chunks if chunk > 0)
+
+
+def _to_zarr(ds: xr.Dataset, n_workers: int, **kwargs):
+    '''
+    Write a chunked dataset to a Zarr store, writing its chunks in parallel in a thread pool.
+    '''
+    import dask
+    with dask.config.set(scheduler='threads', num_workers=max(1, n_workers)):
+        ds.to_zarr(**kwargs)
+
+
+def write_zarr(ds: xr.Dataset, path: Path, group: str, chunk_mb: float = 1, encoding: dict|None = None,
+               n_workers: int = 4):
+    '''
+    Write a dataset into a group of a Zarr store, replacing the group if it exists.
+
+    The dataset is chunked along the append dimensions of the group, see `ZARR_GROUPS`, in chunks of
+    about `chunk_mb` holding whole rows of the other dimensions, and the chunks are written in parallel.
+    Times are stored as seconds since 1970, as in the NetCDF files.
+
+    Args:
+        ds (xr.Dataset): The dataset to write.
+        path (Path): The local directory of the store.
+        group (str): The group of the store, a key of `ZARR_GROUPS`.
+        chunk_mb (float): Target chunk size in MB.
+        encoding (dict | None): Encoding of the variables, such as their dtype.
+        n_workers (int): Number of writing threads.
+    '''
+    _check_zarr()
+    logger = logging.getLogger('glider_ingest')
+    dims = [dim for dim in ZARR_GROUPS[group] if dim in ds.dims and ds.sizes[dim] > 0]
+    chunks = {dim: _chunk_rows(ds, dim, chunk_mb) for dim in dims}
+    encoding = {name: dict(var_encoding) for name, var_encoding in (encoding or {}).items() if name in ds.variables}
+    for dim in dims:
+        if np.issubdtype(ds[dim].dtype, np.datetime64):
+            encoding[dim] = encoding.get(dim, {}) | TIME_ENCODING
+
+    _to_zarr(ds.chunk(chunks), n_workers, store=Path(path), group=group, mode='w', encoding=encoding)
+    logger.debug("Wrote the %s group of %s in chunks of %s rows", group, path, chunks)
+
+
+def append_zarr(ds: xr.Dataset, path: Path, group: str, n_workers: int = 4, rewrite_last: bool = False) -> int:
+    '''
+    Append the rows of a dataset after the last rows of a group of a Zarr store.
+
+    Only the rows after the last stored time of every append dimension are written, the stored chunks
+    are not rewritten apart from a partial last chunk, which the first new rows fill. With `rewrite_last`,
+    the last stored row is also overwritten by the row of the dataset at the same time, so a partial last
+    time bin of a grid is replaced by its regridded version. The other dimensions, such as ``g_pres``,
+    must match the store, and the group attributes are replaced by those of `ds`.
+
+    Args:
+        ds (xr.Dataset): The dataset holding the new rows.
+        path (Path): The local directory of the store.
+        group (str): The group of the store, a key of `ZARR_GROUPS`.
+        n_workers (int): Number of writing threads.
+        rewrite_last (bool): If True, overwrite the last stored row with the dataset row at its time.
+
+    Returns:
+        int: The number of appended rows of the first append dimension of the dataset.
+
+    Raises:
+        ValueError: If the other dimensions of the dataset do not fit the store.
+    '''
+    _check_zarr()
+    logger = logging.getLogger('glider_ingest')
+    dims = [dim for dim in ZARR_GROUPS[group] if dim in ds.dims]
+
+    segments = []
+    rewrites = []
+    with xr.open_zarr(Path(path), group=group) as stored:
+        for dim in ds.dims:
+            if dim in dims or dim not in stored.dims or np.array_equal(ds[dim].values, stored[dim].values):
+                continue
+            # Shorter coordinates, such as a shallower pressure grid, are padded to the stored ones
+            if not np.isin(ds[dim].values, stored[dim].values).all():
+                raise ValueError(f"The {dim} coordinate of the new rows does not fit the {group} group of {path}")
+            ds = ds.reindex({dim: stored[dim].values})
+
+        for dim in dims:
+            last_time = stored[dim].values.max()
+            names = [name for name in ds.data_vars if dim in ds[name].dims]
+            if rewrite_last and names:
+                last_rows = ds.isel({dim: ds[dim].values == last_time})
+                if last_rows.sizes[dim] == 1:
+                    n_stored = stored.sizes[dim]
+                    rewrites.append((dim, n_stored - 1, last_rows[names].drop_vars(
+                        [name for name in last_rows[names].coords if dim not in last_rows[name].dims])))
+
+            new_rows = ds.isel({dim: ds[dim].values > last_time})
+            if new_rows.sizes[dim] == 0 or not names:
+                segments.append((dim, 0, None))
+                continue
+            chunk_rows = stored[dim].encoding['chunks'][0]
+            chunks = _segment_chunks(new_rows.sizes[dim], chunk_rows, stored.sizes[dim])
+            segments.append((dim, new_rows.sizes[dim], new_rows[names].chunk({dim: chunks})))
+
+    for dim, index, row in rewrites:
+        _to_zarr(row, n_workers, store=Path(path), group=group, mode='r+', region={dim: slice(index, index + 1)})
+        logger.debug("Rewrote row %d along %s of the %s group of %s", index, dim, group, path)
+    for dim, n_rows, segment in segments:
+        if segment is not None:
+            _to_zarr(segment, n_workers, store=Path(path), group=group, mode='a', append_dim=dim)
+            logger.debug("Appended %d rows along %s to the %s group of %s", n_rows, dim, group, path)
+    return segments[0][1] if segments else 0
@@ -1,8 +1,35 @@
 import unittest
+import tempfile
 import numpy as np
 import xarray as xr
 from pathlib import Path
-from glider_ingest.gridder import Gridder
+from glider_ingest.gridder import (Gridder, _bin_offsets, _interp_block, _evaluate_valid, _resolve_pressure_duplicates,
+                                   stream_gridded_netcdf)
+from glider_ingest.derived import DerivedVariable
+from glider_ingest.variable import Variable
+
+
+def mission_dataset(times, pressure, temperature, salinity=35.0, density=1025.0, longitude=120.0, latitude=-20.0):
+    '''
+    Build a mission dataset as the Processor does, with the gridded variables along time and the position along m_time.
+
+    Scalar values are repeated for every sample.
+    '''
+    def along_time(values):
+        return np.broadcast_to(np.asarray(values, dtype=float), (len(times),)).copy()
+
+    return xr.Dataset(
+        data_vars={
+            'pressure': ('time', along_time(pressure)),
+            'temperature': ('time', along_time(temperature), {'to_grid': True}),
+            'salinity': ('time', along_time(salinity), {'to_grid': True}),
+            'density': ('time', along_time(density), {'to_grid': True}),
+            'longitude': ('m_time', along_time(longitude)),
+            'latitude': ('m_time', along_time(latitude)),
+        },
+        coords={'time': times, 'm_time': times}
+    )
+
 
 class TestGridder(unittest.TestCase):
     def setUp(self):
@@ -71,6 +98,244 @@ class TestGridder(unittest.TestCase):
             self.assertFalse(np.all(np.isnan(data)), f"Variable {var} contains all NaN values:{data}")
             self.assertTrue(np.any(~np.isnan(data)), f"Variable {var} should contain some valid values:{data}")
 
+    def test_bin_offsets_match_label_slices(self):
+        times = np.array(['2023-01-01T00:30', '2023-01-01T01:00', '2023-01-01T01:20',
+                          '2023-01-01T03:10'], dtype='datetime64[ns]')
+        edges = np.array(['2023-01-01T00:00', '2023-01-01T01:00', '2023-01-01T02:00',
+                          '2023-01-01T03:00', '2023-01-01T04:00'], dtype='datetime64[ns]')
+        starts, stops = _bin_offsets(times, edges)
+        # Samples on a bin edge belong to both neighbouring bins
+        np.testing.assert_array_equal(starts, [0, 1, 3, 3])
+        np.testing.assert_array_equal(stops, [2, 3, 3, 4])
+
+    def test_interpolated_values(self):
+        gridder = Gridder(ds_mission=self.test_dataset)
+        gridder.create_gridded_dataset()
+        np.testing.assert_allclose(gridder.data_arrays['int_temperature'][0, [0, 25, 50]], [20.0, 19.5, 19.0])
+
+    def test_interp_block_matches_per_variable_interp(self):
+        x = np.array([0.0, 1.0, 2.0, 3.0])
+        values = np.array([[1.0, 2.0, np.nan, 4.0],
+                           [5.0, 6.0, 7.0, 8.0]])
+        xi = np.array([-1.0, 0.0, 0.5, 1.5, 2.5, 3.0, 3.5])
+        gridded = _interp_block(x, values, xi)
+        self.assertEqual(gridded.shape, (2, len(xi)))
+        for row, expected in zip(gridded, values):
+            np.testing.assert_array_equal(row, np.interp(xi, x, expected, left=np.nan, right=np.nan))
+
+    def test_evaluate_valid_skips_invalid_cells(self):
+        a = np.array([[1.0, np.nan, 3.0],
+                      [4.0, 5.0, np.nan]])
+        levels = np.array([10.0, 20.0, 30.0])
+        calls = []
+
+        def func(x, p):
+            calls.append(len(x))
+            return x + p
+
+        result = _evaluate_valid(func, a.shape, a, levels, chunk_size=2)
+        np.testing.assert_array_equal(result, [[11.0, np.nan, 33.0],
+                                               [14.0, 25.0, np.nan]])
+        self.assertEqual(calls, [2, 2])
+
+    def test_resolve_pressure_duplicates_matches_reference(self):
+        def reference(pres):
+            # Original per-duplicate loop
+            pres = pres.copy()
+            unique_pres, counts = np.unique(pres, return_counts=True)
+            for pres_val in unique_pres[counts > 1]:
+                for i, idx in enumerate(np.where(pres == pres_val)[0]):
+                    pres[idx] = pres_val + 0.000000000001 * i
+            return pres
+
+        rng = np.random.default_rng(42)
+        # Quantized pressure with heavy duplication, both sorted and unsorted
+        pres = np.round(rng.uniform(0, 200, 5000) / 0.5) * 0.5
+        for values in (pres, np.sort(pres), np.array([3.0]), np.array([])):
+            result = _resolve_pressure_duplicates(values)
+            expected = reference(values)
+            self.assertEqual(result.tobytes(), expected.tobytes())
+        self.assertEqual(len(np.unique(_resolve_pressure_duplicates(pres))), len(pres))
+
+    def test_parallel_gridding_matches_serial(self):
+        n = 2000
+        times = np.datetime64('2023-01-01T00:00:00', 'ns') + np.arange(n) * np.timedelta64(10, 's')
+        pressure = np.round(np.abs(np.sin(np.arange(n) / 50)) * 50, 1)
+        dataset = mission_dataset(times, pressure, 25 - pressure * 0.1, 35 + pressure * 0.01, 1022 + pressure * 0.05)
+        serial = Gridder(ds_mission=dataset)
+        serial._interpolate_variables()
+        parallel = Gridder(ds_mission=dataset, n_workers=2)
+        parallel._interpolate_variables()
+        for key, values in serial.data_arrays.items():
+            np.testing.assert_array_equal(parallel.data_arrays[key], values)
+
+    def test_bin_mean_gridding(self):
+        times = np.array(['2023-01-01T00:00', '2023-01-01T00:10', '2023-01-01T00:20',
+                          '2023-01-01T01:00', '2023-01-01T01:30'], dtype='datetime64[ns]')
+        pressure = np.array([1.0, 1.04, 5.0, 1.0, 10.0])
+        temperature = np.array([20.0, 22.0, 18.0, 30.0, np.nan])
+        dataset = mission_dataset(times, pressure, temperature, density=1024.0)
+        gridder = Gridder(ds_mission=dataset, method='bin_mean')
+        ds_gridded = gridder.create_gridded_dataset()
+
+        temp = gridder.data_arrays['int_temperature']
+        self.assertEqual(temp.shape, (len(gridder.populated_rows), gridder.yy))
+        # 1.0 and 1.04 dbar share the 1.0 dbar cell, the sample on the final edge joins the last row
+        self.assertEqual(temp[0, 10], 24.0)
+        self.assertEqual(gridder.data_counts['int_temperature'][0, 10], 3)
+        self.assertAlmostEqual(gridder.data_std['int_temperature'][0, 10], np.std([20.0, 22.0, 30.0]))
+        self.assertEqual(temp[0, 50], 18.0)
+        self.assertEqual(np.count_nonzero(~np.isnan(temp)), 2)
+        np.testing.assert_array_equal(ds_gridded['g_pres'].values, gridder.int_pres)
+
+    def test_invalid_method(self):
+        with self.assertRaises(ValueError):
+            Gridder(ds_mission=self.test_dataset, method='nearest')
+
+    def test_profile_gridding(self):
+        dive = np.arange(0, 50.5, 0.5)
+        pressure = np.concatenate([dive, dive[::-1][1:]])
+        n = len(pressure)
+        times = np.datetime64('2023-01-01T00:00:00', 'ns') + np.arange(n) * np.timedelta64(10, 's')
+        dataset = mission_dataset(times, pressure, 25 - pressure * 0.1, 35 + pressure * 0.01, 1022 + pressure * 0.05,
+                                  longitude=np.linspace(120.0, 121.0, n))
+        gridder = Gridder(ds_mission=dataset, method='profile')
+        ds_gridded = gridder.create_gridded_dataset()
+
+        self.assertEqual(ds_gridded.sizes['profile'], 2)
+        np.testing.assert_array_equal(ds_gridded['profile_direction'].values, [1, -1])
+        np.testing.assert_array_equal(ds_gridded['profile_time'].values, [times[50], times[150]])
+        self.assertAlmostEqual(ds_gridded['profile_lon'].values[0], np.mean(dataset['longitude'].values[:101]))
+        np.testing.assert_allclose(ds_gridded['g_temperature'].values[:, 100], [24.0, 24.0])
+
+    def test_profile_position_with_nan_pressures(self):
+        # The leading samples without pressure are dropped from time but not from the m_time position
+        dive = np.arange(0, 50.5, 0.5)
+        pressure = np.concatenate([np.full(100, np.nan), dive, dive[::-1][1:]])
+        n = len(pressure)
+        times = np.datetime64('2023-01-01T00:00:00', 'ns') + np.arange(n) * np.timedelta64(10, 's')
+        latitude = np.linspace(10.0, 20.0, n)
+        dataset = mission_dataset(times, pressure, 25 - pressure * 0.1, longitude=np.linspace(120.0, 121.0, n),
+                                  latitude=latitude)
+        ds_gridded = Gridder(ds_mission=dataset, method='profile').create_gridded_dataset()
+
+        np.testing.assert_allclose(ds_gridded['profile_lat'].values,
+                                   [np.mean(latitude[100:201]), np.mean(latitude[200:])])
+        self.assertAlmostEqual(ds_gridded['profile_lon'].values[0], np.mean(dataset['longitude'].values[100:201]))
+
+    def test_compact_storage_of_empty_rows(self):
+        times = np.array(['2023-01-01T00:10', '2023-01-01T00:50',
+                          '2023-01-01T04:10', '2023-01-01T05:00'], dtype='datetime64[ns]')
+        pressure = np.array([0.0, 10.0, 0.0, 10.0])
+        dataset = mission_dataset(times, pressure, 25 - pressure * 0.1, density=1024.0)
+        gridder = Gridder(ds_mission=dataset)
+        # Only the first and last hourly rows hold observations
+        np.testing.assert_array_equal(gridder.populated_rows, [0, 4])
+        self.assertEqual(gridder.data_arrays['int_temperature'].shape, (2, gridder.yy))
+        self.assertFalse(gridder.grid_pres.flags.writeable)
+
+        ds_gridded = gridder.create_gridded_dataset()
+        dense = gridder.dense_array('int_temperature')
+        self.assertEqual(dense.shape, (gridder.xx, gridder.yy))
+        self.assertTrue(np.all(np.isnan(dense[1:4])))
+        np.testing.assert_array_equal(ds_gridded['g_temperature'].values, dense)
+
+    def test_derived_variables_selection(self):
+        gridder = Gridder(ds_mission=self.test_dataset, derived_variables=['g_sp'])
+        ds_gridded = gridder.create_gridded_dataset()
+        self.assertIn('g_sp', ds_gridded.data_vars)
+        self.assertNotIn('g_hc', ds_gridded.data_vars)
+        self.assertNotIn('g_depth', ds_gridded.data_vars)
+
+    def test_custom_derived_variable(self):
+        double_temperature = DerivedVariable(
+            name='g_double_temperature',
+            inputs=['int_temperature'],
+            func=lambda t: 2 * t,
+            variable=Variable(short_name='g_double_temperature', units='Celsius')
+        )
+        gridder = Gridder(ds_mission=self.test_dataset, derived_variables=[double_temperature, 'g_hc'])
+        ds_gridded = gridder.create_gridded_dataset()
+        np.testing.assert_array_equal(ds_gridded['g_double_temperature'].values,
+                                      2 * ds_gridded['g_temperature'].values)
+        self.assertEqual(ds_gridded['g_double_temperature'].attrs['units'], 'Celsius')
+        self.assertEqual(ds_gridded['g_double_temperature'].attrs['resolution'], '1hour and 0.1dbar')
+        self.assertIn('g_hc', ds_gridded.data_vars)
+
+    def test_derived_variable_missing_inputs_skipped(self):
+        ds = self.test_dataset.drop_vars('density')
+        ds_gridded = Gridder(ds_mission=ds).create_gridded_dataset()
+        self.assertNotIn('g_hc', ds_gridded.data_vars)
+        self.assertNotIn('g_phc', ds_gridded.data_vars)
+        self.assertIn('g_sp', ds_gridded.data_vars)
+        self.assertIn('g_depth', ds_gridded.data_vars)
+
+    def test_unknown_derived_variable(self):
+        gridder = Gridder(ds_mission=self.test_dataset, derived_variables=['g_unknown'])
+        with self.assertRaises(ValueError):
+            gridder.create_gridded_dataset()
+
+    def test_multi_resolution(self):
+        times = np.arange('2023-01-01T00:00', '2023-01-01T12:00', np.timedelta64(10, 'm'), dtype='datetime64[ns]')
+        pressure = np.tile([0.0, 4.0, 8.0, 4.0], len(times) // 4)
+        ds = mission_dataset(times, pressure, 20.0 - pressure / 4)
+        gridder = Gridder(ds_mission=ds, resolutions=[(1, 1), (6, 2)])
+        self.assertEqual((gridder.interval_h, gridder.interval_p), (1, 1))
+
+        datasets = gridder.create_gridded_datasets()
+        self.assertEqual(list(datasets), [(1, 1), (6, 2)])
+        fine, coarse = datasets[(1, 1)], datasets[(6, 2)]
+        self.assertEqual(fine['g_temperature'].shape, (11, 8))
+        self.assertEqual(coarse['g_temperature'].shape, (1, 4))
+        self.assertEqual(coarse['g_temperature'].attrs['resolution'], '6hour and 2dbar')
+        # The 2 dbar cell holds the mean of the first 6 hours at 1 and 2 dbar
+        expected = np.nanmean(fine['g_temperature'].values[:6, 1:3])
+        self.assertAlmostEqual(float(coarse['g_temperature'].values[0, 1]), expected)
+        np.testing.assert_array_equal(coarse['g_pres'].values, [0, 2, 4, 6])
+
+        # The coarse level is constructed with the settings of the fine Gridder
+        level = gridder._coarsen_grid(6, 2)
+        self.assertIsInstance(level, Gridder)
+        self.assertEqual((level.interval_h, level.interval_p, level.method), (6, 2, gridder.method))
+        self.assertIs(level.ds, gridder.ds)
+        self.assertIsNone(level._finer_grid)
+
+    def test_invalid_resolutions(self):
+        with self.assertRaises(ValueError):
+            Gridder(ds_mission=self.test_dataset, resolutions=[(1, 0.1), (1.5, 0.1)])
+        with self.assertRaises(ValueError):
+            Gridder(ds_mission=self.test_dataset, resolutions=[])
+
+    def test_stream_gridded_netcdf_matches_full_grid(self):
+        times = np.arange('2023-01-01T00:00', '2023-01-03T12:00', np.timedelta64(10, 'm'), dtype='datetime64[ns]')
+        pressure = np.tile([0.0, 4.0, 8.0, 4.0], len(times) // 4)
+        ds = mission_dataset(times, pressure, 20.0 - pressure / 4 + np.arange(len(times)) / 100)
+        # Samples fall on the window edges, such as 2023-01-02T00:00
+        self.assertIn(np.datetime64('2023-01-02T00:00', 'ns'), times)
+
+        for method in ['interp', 'bin_mean']:
+            full = Gridder(ds_mission=ds, interval_p=1, method=method).create_gridded_dataset()
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                path = stream_gridded_netcdf(ds, Path(tmp_dir) / 'gridded.nc', window_days=1, interval_p=1,
+                                             method=method)
+                with xr.open_dataset(path) as streamed:
+                    np.testing.assert_array_equal(streamed['g_time'].values, full['g_time'].values)
+                    for var_name in full.data_vars:
+                        np.testing.assert_array_equal(streamed[var_name].values, full[var_name].values,
+                                                      err_msg=f'{method} {var_name}')
+
+    def test_grid_dtype_follows_variable(self):
+        ds = self.test_dataset.copy()
+        ds['salinity'] = ds['salinity'].astype('float32')
+        gridder = Gridder(ds_mission=ds)
+        self.assertEqual(gridder.data_arrays['int_salinity'].dtype, np.float32)
+        self.assertEqual(gridder.data_arrays['int_temperature'].dtype, np.float64)
+
+    def test_stream_gridded_netcdf_invalid_window(self):
+        with self.assertRaises(ValueError):
+            stream_gridded_netcdf(self.test_dataset, 'unused.nc', window_days=1, interval_h=5)
+        with self.assertRaises(ValueError):
+            stream_gridded_netcdf(self.test_dataset, 'unused.nc', method='profile')
 
 if __name__ == '__main__':
     unittest.main()
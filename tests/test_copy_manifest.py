@@ -0,0 +1,85 @@
+import unittest
+import tempfile
+import os
+from pathlib import Path
+from glider_ingest.copy_manifest import CopyManifest, file_signature, sync_files, MANIFEST_FILENAME
+
+
+class TestCopyManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.source_root = Path(self.tmp_dir.name) / 'source'
+        self.destination_root = Path(self.tmp_dir.name) / 'destination'
+        (self.source_root / 'LOGS').mkdir(parents=True)
+        (self.source_root / 'LOGS' / 'a.dbd').write_text('first')
+        (self.source_root / 'LOGS' / 'b.dbd').write_text('second')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def sync(self, **kwargs):
+        manifest = CopyManifest.load(self.destination_root / MANIFEST_FILENAME)
+        sources = sorted(self.source_root.rglob('*.dbd'))
+        return sync_files(self.source_root, self.destination_root, sources, manifest, **kwargs)
+
+    def test_copies_new_files_only(self):
+        self.assertEqual(self.sync(), (2, 0))
+        self.assertEqual((self.destination_root / 'LOGS' / 'a.dbd').read_text(), 'first')
+        self.assertTrue((self.destination_root / MANIFEST_FILENAME).exists())
+
+        # A new file in an existing folder is copied, the others are skipped
+        (self.source_root / 'LOGS' / 'c.dbd').write_text('third')
+        self.assertEqual(self.sync(), (1, 2))
+        self.assertEqual((self.destination_root / 'LOGS' / 'c.dbd').read_text(), 'third')
+
+    def test_copies_changed_files(self):
+        self.sync()
+        source = self.source_root / 'LOGS' / 'a.dbd'
+        source.write_text('changed')
+        os.utime(source, ns=(source.stat().st_atime_ns, source.stat().st_mtime_ns + 10**9))
+        self.assertEqual(self.sync(), (1, 1))
+        self.assertEqual((self.destination_root / 'LOGS' / 'a.dbd').read_text(), 'changed')
+
+    def test_hash_skips_touched_files(self):
+        self.sync(hash_files=True)
+        source = self.source_root / 'LOGS' / 'a.dbd'
+        os.utime(source, ns=(source.stat().st_atime_ns, source.stat().st_mtime_ns + 10**9))
+        self.assertEqual(self.sync(hash_files=True), (0, 2))
+        # The manifest records the new modification time
+        self.assertEqual(self.sync(hash_files=False), (0, 2))
+
+    def test_hardlink_mode(self):
+        self.assertEqual(self.sync(mode='hardlink'), (2, 0))
+        destination = self.destination_root / 'LOGS' / 'a.dbd'
+        self.assertTrue(destination.samefile(self.source_root / 'LOGS' / 'a.dbd'))
+        self.assertEqual(self.sync(mode='hardlink'), (0, 2))
+
+        # Switching back to copies replaces the links without touching the source
+        self.assertEqual(self.sync(mode='copy'), (2, 0))
+        self.assertFalse(destination.samefile(self.source_root / 'LOGS' / 'a.dbd'))
+        self.assertEqual(self.sync(mode='copy', trust_manifest=False), (0, 2))
+
+    def test_invalid_mode(self):
+        with self.assertRaises(ValueError):
+            self.sync(mode='move')
+
+    def test_unreadable_manifest_is_ignored(self):
+        self.destination_root.mkdir()
+        (self.destination_root / MANIFEST_FILENAME).write_text('not json')
+        manifest = CopyManifest.load(self.destination_root / MANIFEST_FILENAME)
+        self.assertEqual(manifest.entries, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
+
+    def test_file_signature(self):
+        source = self.source_root / 'LOGS' / 'a.dbd'
+        signature = file_signature(source)
+        self.assertEqual(signature['size'], 5)
+
+        # An unchanged file keeps its recorded checksum, a changed one is read again
+        self.assertEqual(file_signature(source, {**signature, 'crc': 1})['crc'], 1)
+        source.write_text('other')
+        os.utime(source, ns=(source.stat().st_atime_ns, signature['mtime_ns'] + 10**9))
+        self.assertNotEqual(file_signature(source, signature)['crc'], signature['crc'])
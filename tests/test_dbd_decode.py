@@ -0,0 +1,57 @@
+import unittest
+import tempfile
+from pathlib import Path
+import numpy as np
+import dbdreader
+from glider_ingest.dbd_decode import get_sync
+from glider_ingest.segment_cache import SegmentCache
+
+# Sample files shipped with dbdreader
+SAMPLE_DIR = Path(dbdreader.__file__).parent / 'data'
+SAMPLE_FILES = [str(SAMPLE_DIR / name) for name in
+                ['sebastian-2014-204-05-000.ebd', 'sebastian-2014-204-05-001.ebd', 'amadeus-2014-204-05-000.ebd']]
+
+
+def _open_samples():
+    try:
+        return dbdreader.MultiDBD(filenames=SAMPLE_FILES)
+    except (dbdreader.DbdError, OSError):
+        return None
+
+
+class TestDbdDecode(unittest.TestCase):
+    def setUp(self):
+        self.dbd = _open_samples()
+        if self.dbd is None:
+            self.skipTest('dbdreader sample files or their cache files are not available')
+        self.parameters = ['sci_water_pressure', 'sci_water_temp', 'sci_water_cond', 'sci_flbbcd_bb_units']
+
+    def tearDown(self):
+        if self.dbd is not None:
+            self.dbd.close()
+
+    def test_matches_multidbd(self):
+        expected = self.dbd.get_sync(*self.parameters)
+        for n_workers in [1, 2]:
+            result = get_sync(self.dbd, *self.parameters, n_workers=n_workers)
+            self.assertEqual(len(result), len(expected))
+            for values, expected_values in zip(result, expected):
+                np.testing.assert_array_equal(values, expected_values)
+
+    def test_unknown_parameter_is_nan(self):
+        result = get_sync(self.dbd, 'sci_water_pressure', 'm_not_a_sensor')
+        self.assertTrue(np.isnan(result[2]).all())
+        self.assertEqual(len(result[2]), len(result[0]))
+
+    def test_segment_cache(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache = SegmentCache(Path(tmp_dir))
+            expected = self.dbd.get_sync(*self.parameters)
+            # Fill the cache with part of the parameters, the others are decoded on the next call
+            get_sync(self.dbd, *self.parameters[:2], cache=cache)
+            self.assertEqual(len(list(Path(tmp_dir).iterdir())), len(SAMPLE_FILES))
+            result = get_sync(self.dbd, *self.parameters, cache=cache)
+            for values, expected_values in zip(result, expected):
+                np.testing.assert_array_equal(values, expected_values)
+            entry = next(Path(tmp_dir).iterdir())
+            self.assertEqual(sorted(path.stem for path in entry.iterdir()), sorted(self.parameters))
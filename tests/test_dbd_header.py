@@ -0,0 +1,64 @@
+import unittest
+import tempfile
+from pathlib import Path
+import pandas as pd
+from glider_ingest.dbd_header import read_dbd_header, HeaderCache
+
+
+def write_dbd(path, full_filename, the8x3_filename, fileopen_time):
+    header = (
+        'dbd_label:    DBD(dinkum_binary_data)file\n'
+        'encoding_ver:    5\n'
+        'num_ascii_tags:    9\n'
+        'all_sensors:    0\n'
+        f'full_filename:    {full_filename}\n'
+        f'the8x3_filename:    {the8x3_filename}\n'
+        f'fileopen_time:    {fileopen_time}\n'
+        'sensor_list_crc:    8A0B7C43\n'
+        'total_num_sensors:    1895\n'
+    )
+    # Binary data follows the header
+    path.write_bytes(header.encode('ascii') + b'\x00\xff\n: not a tag\n')
+
+
+class TestDbdHeader(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp_dir.name)
+        self.later = self.root / '01230001.ebd'
+        self.earlier = self.root / '01230000.ebd'
+        write_dbd(self.later, 'unit_307-2024-044-0-1', '01230001', 'Wed_Feb_14_01:00:00_2024')
+        write_dbd(self.earlier, 'unit_307-2024-044-0-0', '01230000', 'Tue_Feb_13_17:48:22_2024')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_read_dbd_header(self):
+        tags = read_dbd_header(self.earlier)
+        self.assertEqual(tags['full_filename'], 'unit_307-2024-044-0-0')
+        self.assertEqual(tags['the8x3_filename'], '01230000')
+        self.assertEqual(tags['sensor_list_crc'], '8A0B7C43')
+        # Reading stops after num_ascii_tags lines
+        self.assertEqual(len(tags), 9)
+
+    def test_read_dbd_header_not_a_dbd_file(self):
+        other = self.root / 'other.ebd'
+        other.write_bytes(b'\x00\x01\x02')
+        self.assertIsNone(read_dbd_header(other))
+
+    def test_header_cache_metadata(self):
+        cache_path = self.root / 'headers.json'
+        metadata = HeaderCache.load(cache_path).get_metadata([self.later, self.earlier])
+        self.assertEqual(list(metadata.index), [str(self.earlier), str(self.later)])
+        self.assertEqual(metadata['fileopen_time'].iloc[0], pd.Timestamp('2024-02-13 17:48:22'))
+        self.assertEqual(metadata['total_num_sensors'].iloc[0], 1895)
+        self.assertTrue(cache_path.exists())
+
+        # Cached headers are not read again
+        cache = HeaderCache.load(cache_path)
+        cache.entries[str(self.earlier)]['full_filename'] = 'cached'
+        self.assertEqual(cache.get_metadata([self.earlier])['full_filename'].iloc[0], 'cached')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+import tempfile
+import os
+from pathlib import Path
+from glider_ingest.file_index import FileIndex
+
+
+class TestFileIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp_dir.name) / 'memory_card_copy'
+        for directory in ['Flight_card/LOGS', 'Flight_card/STATE/CACHE', 'Science_card/LOGS', 'Science_card/OTHER']:
+            (self.root / directory).mkdir(parents=True)
+        (self.root / 'Flight_card' / 'LOGS' / '00000000.dbd').touch()
+        (self.root / 'Flight_card' / 'STATE' / 'CACHE' / 'abcd.cac').touch()
+        (self.root / 'Science_card' / 'LOGS' / '00000000.ebd').touch()
+        (self.root / 'Science_card' / 'OTHER' / '00000001.ebd').touch()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_get_files(self):
+        index = FileIndex(self.root)
+        self.assertEqual(index.get_files(['.dbd', '.ebd']), sorted([
+            str(self.root / 'Flight_card' / 'LOGS' / '00000000.dbd'),
+            str(self.root / 'Science_card' / 'LOGS' / '00000000.ebd'),
+            str(self.root / 'Science_card' / 'OTHER' / '00000001.ebd'),
+        ]))
+        self.assertEqual(index.get_files(['.ebd'], card='Flight_card'), [])
+        self.assertEqual(index.get_files(['.ebd'], directory=self.root / 'Science_card' / 'LOGS'),
+                         [str(self.root / 'Science_card' / 'LOGS' / '00000000.ebd')])
+        self.assertEqual(len(index.get_files()), 4)
+
+    def test_find_directories(self):
+        index = FileIndex(self.root)
+        self.assertEqual(index.find_directories(['LOGS', 'STATE/CACHE']), [
+            self.root / 'Flight_card' / 'LOGS',
+            self.root / 'Flight_card' / 'STATE' / 'CACHE',
+            self.root / 'Science_card' / 'LOGS',
+        ])
+        self.assertEqual(index.find_directories(directory=self.root / 'Flight_card' / 'STATE'), [
+            self.root / 'Flight_card' / 'STATE',
+            self.root / 'Flight_card' / 'STATE' / 'CACHE',
+        ])
+
+    def test_invalidate(self):
+        index = FileIndex(self.root)
+        self.assertEqual(len(index.get_files(['.dbd'])), 1)
+        (self.root / 'Flight_card' / 'LOGS' / '00000001.dbd').touch()
+        self.assertEqual(len(index.get_files(['.dbd'])), 1)
+        index.invalidate()
+        self.assertEqual(len(index.get_files(['.dbd'])), 2)
+
+    def test_snapshot_reuses_unchanged_directories(self):
+        snapshot_path = Path(self.tmp_dir.name) / 'index.json'
+        FileIndex(self.root, snapshot_path=snapshot_path).build()
+        self.assertTrue(snapshot_path.exists())
+
+        # A snapshot record is used as long as the directory modification time is unchanged
+        logs = self.root / 'Flight_card' / 'LOGS'
+        mtime_ns = logs.stat().st_mtime_ns
+        (logs / '00000001.dbd').touch()
+        os.utime(logs, ns=(mtime_ns, mtime_ns))
+        self.assertEqual(len(FileIndex(self.root, snapshot_path=snapshot_path).get_files(['.dbd'])), 1)
+
+        os.utime(logs, ns=(mtime_ns, mtime_ns + 10**9))
+        self.assertEqual(len(FileIndex(self.root, snapshot_path=snapshot_path).get_files(['.dbd'])), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+import tempfile
+from pathlib import Path
+import numpy as np
+import xarray as xr
+from glider_ingest.netcdf_encoding import get_encoding, packing_encoding
+from glider_ingest.variable import Variable
+
+
+class TestNetcdfEncoding(unittest.TestCase):
+    def setUp(self):
+        times = np.arange('2023-01-01T00:00', '2023-01-02T00:00', np.timedelta64(1, 'm'), dtype='datetime64[ns]')
+        temperature = 20.0 + np.sin(np.arange(len(times)) / 100)
+        temperature[10] = np.nan
+        self.ds = xr.Dataset(
+            data_vars={
+                'temperature': ('time', temperature),
+                'g_temperature': (('g_time', 'g_pres'), np.full((4, 3), 18.5)),
+            },
+            coords={'time': times, 'g_time': times[:4], 'g_pres': [0.0, 1.0, 2.0]}
+        )
+        self.variables = [Variable(short_name='temperature', valid_min=-5.0, valid_max=40.0, precision=0.001)]
+
+    def test_packing_encoding(self):
+        packing = packing_encoding(self.variables[0])
+        self.assertEqual(packing['dtype'], 'int16')
+        self.assertEqual(packing['scale_factor'], 0.001)
+        self.assertEqual(packing['add_offset'], 17.5)
+        # Five decimals of latitude do not fit int16
+        latitude = Variable(short_name='latitude', valid_min=-90.0, valid_max=90.0, precision=5)
+        self.assertEqual(packing_encoding(latitude)['dtype'], 'int32')
+        self.assertIsNone(packing_encoding(Variable(short_name='salinity', precision='')))
+
+    def test_chunks_follow_time_and_profiles(self):
+        encoding = get_encoding(self.ds, 'fast')
+        self.assertEqual(encoding['temperature']['chunksizes'], (len(self.ds.time),))
+        self.assertEqual(encoding['g_temperature']['chunksizes'], (4, 3))
+        # Unlimited dimensions are not cut to their current length
+        encoding = get_encoding(self.ds, 'fast', unlimited_dims=['g_time'])
+        self.assertGreater(encoding['g_temperature']['chunksizes'][0], 4)
+
+    def test_packed_round_trip(self):
+        encoding = get_encoding(self.ds, 'erddap', variables=self.variables)
+        self.assertEqual(encoding['temperature']['dtype'], 'int16')
+        self.assertEqual(encoding['g_temperature']['dtype'], 'int16')
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = Path(tmp_dir) / 'packed.nc'
+            self.ds.to_netcdf(path, encoding=encoding)
+            with xr.open_dataset(path) as ds:
+                np.testing.assert_allclose(ds.temperature.values, self.ds.temperature.values, atol=0.0005)
+                self.assertTrue(np.isnan(ds.temperature.values[10]))
+
+    def test_not_packed_outside_packed_range(self):
+        self.ds['temperature'][0] = 60.0
+        encoding = get_encoding(self.ds, 'erddap', variables=self.variables)
+        self.assertNotIn('dtype', encoding['temperature'])
+        self.assertEqual(encoding['g_temperature']['dtype'], 'int16')
+
+    def test_invalid_profile(self):
+        with self.assertRaises(ValueError):
+            get_encoding(self.ds, 'small')
+
+
+if __name__ == '__main__':
+    unittest.main()
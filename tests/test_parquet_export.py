@@ -0,0 +1,56 @@
+import unittest
+import tempfile
+import json
+from importlib.util import find_spec
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from glider_ingest.parquet_export import GLOBAL_ATTRS_KEY, write_parquet
+
+
+class TestParquetExport(unittest.TestCase):
+    def setUp(self):
+        if find_spec('pyarrow') is None:
+            self.skipTest('pyarrow is needed to write Parquet files')
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp_dir.name) / 'mission.parquet'
+        time = pd.DatetimeIndex(pd.date_range('2023-01-01T12:00', periods=2880, freq='min'), name='time')
+        self.df = pd.DataFrame({'temperature': 20.0 + np.arange(len(time)) / 1000,
+                                'oxygen': np.full(len(time), 200.0, dtype='float32')}, index=time)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_partitioned_by_day(self):
+        n_days = write_parquet(self.df, self.path, row_group_rows=500)
+        self.assertEqual(n_days, 3)
+        self.assertEqual(sorted(p.name for p in self.path.iterdir()),
+                         ['date=2023-01-01', 'date=2023-01-02', 'date=2023-01-03'])
+
+        df = pd.read_parquet(self.path).drop(columns='date')
+        pd.testing.assert_frame_equal(df, self.df, check_freq=False)
+
+        import pyarrow.parquet as pq
+        metadata = pq.ParquetFile(next((self.path / 'date=2023-01-02').iterdir())).metadata
+        self.assertEqual(metadata.num_row_groups, 3)
+        self.assertTrue(metadata.row_group(0).column(0).statistics.has_min_max)
+
+    def test_metadata(self):
+        write_parquet(self.df, self.path, column_attrs={'temperature': {'units': 'Celsius', 'valid_max': 40.0}},
+                      global_attrs={'title': 'Mission 46', 'geospatial_lat_max': np.float64(27.5)})
+
+        import pyarrow.dataset as pds
+        schema = pds.dataset(self.path, partitioning='hive').schema
+        self.assertEqual(schema.field('temperature').metadata[b'units'], b'Celsius')
+        self.assertEqual(schema.field('temperature').metadata[b'valid_max'], b'40.0')
+        global_attrs = json.loads(schema.metadata[GLOBAL_ATTRS_KEY.encode()])
+        self.assertEqual(global_attrs['title'], 'Mission 46')
+
+    def test_rewrite_replaces_days(self):
+        write_parquet(self.df, self.path)
+        write_parquet(self.df[self.df.index >= '2023-01-03'], self.path)
+        self.assertEqual(len(pd.read_parquet(self.path)), len(self.df))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,12 +1,17 @@
 import unittest
 from pathlib import Path
+import numpy as np
 import pandas as pd
+import xarray as xr
 import pytest
 import shutil
 import io
 import sys
 from glider_ingest.processor import Processor
 from glider_ingest.variable import Variable
+from glider_ingest.gridder import Gridder
+
+from .test_Gridder import mission_dataset
 
 class TestProcessor(unittest.TestCase):
     def setUp(self):
@@ -155,25 +160,149 @@ class TestProcessor(unittest.TestCase):
         self.assertEqual(len(variables), 2)
         self.assertEqual(variables[0].data_source_name, 'test1')
 
-    def test_format_time(self):
-        test_df = pd.DataFrame({
-            'time': [1577836800, 1577923200],  # 2020-01-01, 2020-01-02
-            'value': [1, 2]
-        })
-
-        formatted_df = self.processor._format_time(test_df)
-        self.assertTrue(pd.api.types.is_datetime64_any_dtype(formatted_df['time']))
-        self.assertEqual(len(formatted_df), 2)
+    def test_build_dataframe(self):
+        self.processor.mission_start_date = pd.Timestamp('2020-01-01')
+        self.processor.mission_end_date = pd.Timestamp('2020-01-02')
+        # 2019-12-31, 2020-01-01, missing time, 2020-01-02
+        data = (np.array([1577750400, 1577836800, np.nan, 1577923200]),
+                np.array([1.0, 2.0, 3.0, 4.0]), np.array([5.0, np.nan, 7.0, 8.0]))
+
+        df = self.processor._build_dataframe(data, ['m_depth', 'sci_water_temp'])
+        self.assertEqual(df.index.name, 'time')
+        self.assertEqual(list(df.index), [pd.Timestamp('2020-01-01'), pd.Timestamp('2020-01-02')])
+        np.testing.assert_array_equal(df['m_depth'].values, [2.0, 4.0])
+        np.testing.assert_array_equal(df['sci_water_temp'].values, [np.nan, 8.0])
+
+    def test_build_dataframe_dtype(self):
+        self.processor.mission_start_date = pd.Timestamp('2020-01-01')
+        self.processor.mission_end_date = pd.Timestamp('2020-01-02')
+        self.processor.mission_vars = [Variable(data_source_name='sci_oxy4_oxygen', short_name='oxygen', dtype='float32')]
+        data = (np.array([1577836800, 1577923200]), np.array([1.0, 2.0]), np.array([5.0, 6.0]))
+
+        df = self.processor._build_dataframe(data, ['sci_oxy4_oxygen', 'm_depth'])
+        self.assertEqual(df['sci_oxy4_oxygen'].dtype, np.float32)
+        self.assertEqual(df['m_depth'].dtype, np.float64)
+
+    def test_build_dataframe_column_mismatch(self):
+        data = (np.array([1577836800, 1577923200]), np.array([1.0, 2.0]))
+        with self.assertLogs('glider_ingest', level='WARNING') as logs:
+            self.processor._build_dataframe(data, ['m_depth', 'sci_water_temp'])
+        self.assertIn('does not match the number of mission variables, 2 vs 3', logs.output[0])
+
+    def test_dataset_from_dataframe(self):
+        self.processor.mission_vars = [Variable(data_source_name='sci_water_temp', short_name='temperature'),
+                                       Variable(data_source_name='m_depth', short_name='depth')]
+        time = pd.DatetimeIndex(['2020-01-01', '2020-01-02'], name='time')
+        df = pd.DataFrame({'temperature': [20.0, 21.0], 'depth': [1.0, 2.0]}, index=time)
+
+        ds = self.processor._dataset_from_dataframe(df)
+        self.assertEqual(ds['temperature'].dims, ('time',))
+        self.assertEqual(ds['depth'].dims, ('m_time',))
+        np.testing.assert_array_equal(ds['m_time'].values, time.values)
+        self.assertTrue(np.shares_memory(ds['depth'].values, df['depth'].to_numpy()))
+
+        self.processor._df = df
+        self.assertIs(self.processor.sci_ds, self.processor.sci_ds)
+        self.assertEqual(list(self.processor.sci_ds.data_vars), ['temperature'])
+        self.assertEqual(list(self.processor.eng_ds.data_vars), ['depth'])
+        self.assertEqual(self.processor.eng_df.index.name, 'm_time')
+
+    def test_grid_appended_rows_on_bin_edge(self):
+        times = np.arange('2023-01-01T00:00', '2023-01-01T06:10', np.timedelta64(10, 'm'), dtype='datetime64[ns]')
+        pressure = np.tile([0.0, 4.0, 8.0, 12.0, 8.0, 4.0], len(times) // 6 + 1)[:len(times)]
+        ds_full = mission_dataset(times, pressure, 20.0 - pressure / 4 + np.arange(len(times)) / 100,
+                                  longitude=-90.0, latitude=27.0)
+        full = Gridder(ds_full, max_pressure=12.0).create_gridded_dataset()
+
+        # The first new row is on the 03:00 edge, which ends the bin it opens in the saved grid
+        n_saved = np.searchsorted(times, np.datetime64('2023-01-01T03:00'), side='left')
+        ds_saved = ds_full.isel(time=slice(0, n_saved), m_time=slice(0, n_saved))
+        ds_saved = xr.merge([ds_saved, Gridder(ds_saved, max_pressure=12.0).create_gridded_dataset()])
+        ds_new = ds_full.isel(time=slice(n_saved, None), m_time=slice(n_saved, None))
+
+        first_bin, ds_gridded = self.processor._grid_appended_rows(ds_saved, ds_new, 12.0, lat=27.0, lon=-90.0)
+        self.assertEqual(first_bin, ds_saved.sizes['g_time'])
+        g_temperature = np.concatenate([ds_saved['g_temperature'].values[:first_bin],
+                                        ds_gridded['g_temperature'].values])
+        np.testing.assert_array_equal(g_temperature, full['g_temperature'].values)
+        np.testing.assert_array_equal(ds_gridded['g_depth'].values, full['g_depth'].values[first_bin:])
 
     def test_update_dataframe_columns(self):
         test_var = Variable(data_source_name='test_source', short_name='test_short')
         self.processor.mission_vars = [test_var]
 
-        test_df = pd.DataFrame({'test_source': [1, 2, 3]})
+        test_df = pd.DataFrame({'test_source': [1, 2, 3], 'other': [4, 5, 6]})
+        values = test_df['test_source'].to_numpy()
         updated_df = self.processor._update_dataframe_columns(test_df)
 
-        self.assertIn('test_short', updated_df.columns)
-        self.assertNotIn('test_source', updated_df.columns)
+        self.assertEqual(list(updated_df.columns), ['test_short', 'other'])
+        self.assertTrue(np.shares_memory(updated_df['test_short'].to_numpy(), values))
+
+    def test_invalid_copy_mode(self):
+        with self.assertRaises(ValueError):
+            Processor(memory_card_copy_path=self.memory_card_copy_path, working_dir=self.working_dir,
+                      mission_num='46', copy_mode='move')
+
+    def test_invalid_encoding_profile(self):
+        with self.assertRaises(ValueError):
+            Processor(memory_card_copy_path=self.memory_card_copy_path, working_dir=self.working_dir,
+                      mission_num='46', encoding_profile='small')
+
+    def test_get_dbd_files_copy_mode_none(self):
+        logs = self.memory_card_copy_path / 'Flight_card' / 'LOGS'
+        logs.mkdir(parents=True, exist_ok=True)
+        (logs / '00000000.dbd').touch()
+        self.addCleanup((logs / '00000000.dbd').unlink)
+        other = self.memory_card_copy_path / 'Flight_card' / 'OTHER'
+        other.mkdir(parents=True, exist_ok=True)
+        (other / '00000001.dbd').touch()
+        self.addCleanup((other / '00000001.dbd').unlink)
+
+        self.processor.copy_mode = 'none'
+        dbd_files = self.processor._get_dbd_files()
+        self.assertIn(logs / '00000000.dbd', dbd_files)
+        self.assertNotIn(other / '00000001.dbd', dbd_files)
+
+    def test_filter_files_by_time(self):
+        logs = self.memory_card_copy_path / 'Science_card' / 'LOGS'
+        logs.mkdir(parents=True, exist_ok=True)
+        filenames = []
+        for day in range(1, 6):
+            path = logs / f'0123000{day}.ebd'
+            path.write_text('dbd_label:    DBD(dinkum_binary_data)file\n'
+                            'num_ascii_tags:    3\n'
+                            f'fileopen_time:    Mon_Jan_0{day}_00:00:00_2024\n')
+            self.addCleanup(path.unlink)
+            filenames.append(str(path))
+
+        self.processor.mission_start_date = pd.Timestamp('2024-01-03 06:00')
+        self.processor.mission_end_date = pd.Timestamp('2024-01-03 18:00')
+        # The file overlapping the window and one file on each side are kept
+        self.assertEqual(self.processor._filter_files_by_time(filenames), filenames[1:4])
+
+        # Files without an open time are kept, and without a dated file in the window all files are decoded
+        undated = logs / '01230006.ebd'
+        undated.write_text('dbd_label:    DBD(dinkum_binary_data)file\n')
+        self.addCleanup(undated.unlink)
+        filenames.append(str(undated))
+        self.assertEqual(self.processor._filter_files_by_time(filenames), filenames[1:4] + filenames[5:])
+        self.processor.mission_start_date = pd.Timestamp('2023-01-01')
+        self.processor.mission_end_date = pd.Timestamp('2023-12-31')
+        self.assertEqual(self.processor._filter_files_by_time(filenames), filenames)
+
+    def test_copy_files_symlink_mode(self):
+        logs = self.memory_card_copy_path / 'Flight_card' / 'LOGS'
+        logs.mkdir(parents=True, exist_ok=True)
+        (logs / '00000002.dbd').write_text('dbd')
+        self.addCleanup((logs / '00000002.dbd').unlink)
+
+        self.processor.copy_mode = 'symlink'
+        self.processor._copy_files()
+
+        dest_file = self.working_dir / self.processor.mission_folder_name / 'Flight_card' / 'LOGS' / '00000002.dbd'
+        self.addCleanup(dest_file.unlink)
+        self.assertTrue(dest_file.is_symlink())
+        self.assertEqual(dest_file.read_text(), 'dbd')
 
 if __name__ == '__main__':
     unittest.main()
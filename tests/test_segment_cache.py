@@ -0,0 +1,44 @@
+import unittest
+import tempfile
+import os
+from pathlib import Path
+import numpy as np
+from glider_ingest.segment_cache import SegmentCache, segment_key
+
+
+class TestSegmentCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache = SegmentCache(Path(self.tmp_dir.name) / 'cache')
+        self.column = (np.arange(5.0), np.arange(5.0) * 2)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_partial_hit(self):
+        self.cache.save('a', {'m_depth': self.column})
+        columns = self.cache.load('a', ['m_depth', 'm_lat'])
+        self.assertEqual(list(columns), ['m_depth'])
+        np.testing.assert_array_equal(columns['m_depth'][1], self.column[1])
+        self.assertEqual(self.cache.load('b', ['m_depth']), {})
+
+    def test_key_changes_with_file(self):
+        path = Path(self.tmp_dir.name) / '01230000.dbd'
+        path.write_bytes(b'data')
+        key = segment_key(path, 'abcd1234')
+        self.assertNotEqual(segment_key(path, '00000000'), key)
+        path.write_bytes(b'more data')
+        self.assertNotEqual(segment_key(path, 'abcd1234'), key)
+
+    def test_evicts_least_recently_used(self):
+        for key in ['a', 'b', 'c']:
+            self.cache.save(key, {'m_depth': self.column})
+        entry_size = (self.cache.directory / 'a' / 'm_depth.npy').stat().st_size
+        for age, key in enumerate(['c', 'a', 'b']):
+            os.utime(self.cache.directory / key, ns=(age * 10**9, age * 10**9))
+        # Using an entry makes it the most recently used
+        self.cache.load('c', ['m_depth'])
+
+        self.cache.max_bytes = 2 * entry_size
+        self.assertEqual(self.cache.evict(), 1)
+        self.assertEqual(sorted(path.name for path in self.cache.directory.iterdir()), ['b', 'c'])
@@ -3,11 +3,14 @@ import numpy as np
 import xarray as xr
 import io
 import sys
+import tempfile
+from pathlib import Path
 import pytest
 from glider_ingest.utils import (
     print_time, find_nth, invert_dict,
     get_polygon_coords,
-    timing,get_wmo_id, f_print, get_polygon_bounds
+    timing,get_wmo_id, f_print, get_polygon_bounds, find_profiles,
+    write_netcdf_rows, TIME_ENCODING
 )
 
 class TestUtils(unittest.TestCase):
@@ -201,4 +204,47 @@ class TestUtils(unittest.TestCase):
         # Test unit glider
         self.assertEqual(get_wmo_id('1148'), '4801915')
 
-
+    def test_find_profiles(self):
+        # Two dive/climb cycles to 50 dbar with small reversals during the descent
+        dive = np.arange(0, 50.5, 0.5)
+        dive[10:12] -= 0.6
+        climb = dive[::-1]
+        pressure = np.concatenate([dive, climb[1:], dive[1:], climb[1:]])
+        starts, stops, directions = find_profiles(pressure, hysteresis=1.0, min_extent=10.0)
+        np.testing.assert_array_equal(directions, [1, -1, 1, -1])
+        np.testing.assert_array_equal(starts, [0, 100, 200, 300])
+        np.testing.assert_array_equal(stops, [101, 201, 301, 401])
+
+    def test_find_profiles_min_extent(self):
+        pressure = np.array([0.0, 2.0, 4.0, 2.0, 0.0])
+        starts, stops, directions = find_profiles(pressure, hysteresis=1.0, min_extent=10.0)
+        self.assertEqual(len(starts), 0)
+        self.assertEqual(len(find_profiles(np.array([1.0]))[0]), 0)
+
+    def test_write_netcdf_rows(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = Path(tmp_dir) / 'rows.nc'
+            self.test_ds.drop_attrs().to_netcdf(path, unlimited_dims=['time'], encoding={'time': TIME_ENCODING})
+
+            # Overwrite the last row and append one
+            times = np.array(['2024-01-01T01:00:00', '2024-01-01T02:00:00'], dtype='datetime64[ns]')
+            rows = xr.Dataset({'temperature': ('time', [25, 22])}, coords={'time': times})
+            write_netcdf_rows(path, rows, 'time', 1)
+
+            with xr.open_dataset(path) as ds:
+                np.testing.assert_array_equal(ds.temperature.values, [20, 25, 22])
+                np.testing.assert_array_equal(ds.time.values[1:], times)
+
+    def test_write_netcdf_rows_packed(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = Path(tmp_dir) / 'rows.nc'
+            packing = {'dtype': 'int16', 'scale_factor': 0.01, 'add_offset': 0.0, '_FillValue': -32768}
+            self.test_ds.drop_attrs().to_netcdf(path, unlimited_dims=['time'],
+                                                encoding={'time': TIME_ENCODING, 'salinity': packing})
+
+            times = np.array(['2024-01-01T02:00:00'], dtype='datetime64[ns]')
+            rows = xr.Dataset({'salinity': ('time', [np.nan])}, coords={'time': times})
+            write_netcdf_rows(path, rows, 'time', 2)
+
+            with xr.open_dataset(path) as ds:
+                self.assertTrue(np.isnan(ds.salinity.values[2]))
@@ -43,6 +43,13 @@ class TestVariable(unittest.TestCase):
         self.assertEqual(result["data_source_name"], "temp")
         self.assertEqual(result["units"], "celsius")
 
+    def test_dtype(self):
+        var = Variable(short_name='temperature')
+        self.assertEqual(var.dtype, 'float64')
+        var2 = Variable(short_name='oxygen', dtype='float32')
+        self.assertEqual(var2.dtype, 'float32')
+        self.assertNotIn('dtype', var2.to_dict())
+
     def test_variable_with_mixed_types(self):
         var = Variable(short_name='temperature',
             resolution=0.5,
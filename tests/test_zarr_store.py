@@ -0,0 +1,85 @@
+import unittest
+import tempfile
+from importlib.util import find_spec
+from pathlib import Path
+import numpy as np
+import xarray as xr
+from glider_ingest.zarr_store import _segment_chunks, append_zarr, split_zarr_groups, write_zarr
+
+
+def _mission_ds(start, n_time, n_g_time):
+    times = np.datetime64(start, 'ns') + np.arange(n_time) * np.timedelta64(1, 'm')
+    g_times = np.datetime64(start, 'ns') + np.arange(n_g_time) * np.timedelta64(1, 'h')
+    return xr.Dataset(
+        data_vars={
+            'temperature': ('time', 20.0 + np.arange(n_time) / 100),
+            'depth': ('m_time', np.arange(n_time) % 50.0),
+            'g_temperature': (('g_time', 'g_pres'), np.full((n_g_time, 3), 18.5)),
+        },
+        coords={'time': times, 'm_time': times, 'g_time': g_times, 'g_pres': [0.0, 1.0, 2.0]},
+        attrs={'title': 'test'}
+    )
+
+
+class TestSegmentChunks(unittest.TestCase):
+    def test_segment_chunks(self):
+        # The first chunk fills the partial last chunk of the store
+        self.assertEqual(_segment_chunks(10, 4, 6), (2, 4, 4))
+        self.assertEqual(_segment_chunks(3, 4, 8), (3,))
+        self.assertEqual(_segment_chunks(7, 4, 3), (1, 4, 2))
+
+
+class TestZarrStore(unittest.TestCase):
+    def setUp(self):
+        if find_spec('zarr') is None or find_spec('dask') is None:
+            self.skipTest('zarr and dask are needed to write Zarr stores')
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp_dir.name) / 'mission.zarr'
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _write(self, ds):
+        for group, ds_group in split_zarr_groups(ds).items():
+            write_zarr(ds_group, self.path, group, chunk_mb=0.001)
+
+    def test_split_groups(self):
+        groups = split_zarr_groups(_mission_ds('2023-01-01', 10, 2))
+        self.assertEqual(list(groups['timeseries'].data_vars), ['temperature', 'depth'])
+        self.assertEqual(list(groups['gridded'].data_vars), ['g_temperature'])
+
+    def test_append_segment(self):
+        full = _mission_ds('2023-01-01', 500, 9)
+        self._write(full.isel(time=slice(0, 300), m_time=slice(0, 300), g_time=slice(0, 5)))
+        for group, ds_group in split_zarr_groups(full).items():
+            append_zarr(ds_group, self.path, group)
+
+        with xr.open_zarr(self.path, group='timeseries') as ds:
+            self.assertEqual(ds.temperature.encoding['chunks'], (131,))
+            np.testing.assert_array_equal(ds.temperature.values, full.temperature.values)
+            np.testing.assert_array_equal(ds.m_time.values, full.m_time.values)
+        with xr.open_zarr(self.path, group='gridded') as ds:
+            np.testing.assert_array_equal(ds.g_time.values, full.g_time.values)
+            np.testing.assert_array_equal(ds.g_temperature.values, full.g_temperature.values)
+
+    def test_append_rewrites_last_bin(self):
+        full = _mission_ds('2023-01-01', 500, 9)
+        partial = full.isel(g_time=slice(0, 5)).copy(deep=True)
+        # The last stored bin was gridded from part of its rows
+        partial['g_temperature'][-1] = np.nan
+        self._write(partial)
+        append_zarr(split_zarr_groups(full)['gridded'], self.path, 'gridded', rewrite_last=True)
+
+        with xr.open_zarr(self.path, group='gridded') as ds:
+            np.testing.assert_array_equal(ds.g_time.values, full.g_time.values)
+            np.testing.assert_array_equal(ds.g_temperature.values, full.g_temperature.values)
+
+    def test_append_mismatched_pressure_grid(self):
+        self._write(_mission_ds('2023-01-01', 10, 2))
+        ds = _mission_ds('2023-01-02', 10, 2).assign_coords(g_pres=[0.0, 1.0, 5.0])
+        with self.assertRaises(ValueError):
+            append_zarr(split_zarr_groups(ds)['gridded'], self.path, 'gridded')
+
+
+if __name__ == '__main__':
+    unittest.main()